@@ -0,0 +1,339 @@
+"""
+_kernels.py
+Kernels numéricos de baixo nível para as agregações por (bin, safra).
+
+Os kernels operam sobre arrays inteiros já fatorizados (códigos de bin e de
+safra) e fazem uma única passada linear sobre os dados. Se o Numba estiver
+instalado a versão compilada é usada; caso contrário recorre-se a NumPy
+(``np.bincount``), com o mesmo resultado.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+try:  # numba é opcional
+    from numba import get_num_threads, njit, prange
+except ImportError:
+    njit = None
+
+
+# ------------------------------------------------------------------ #
+def _hist2d_numpy(
+    bins: np.ndarray, times: np.ndarray, y: np.ndarray, n_bins: int, n_times: int
+) -> np.ndarray:
+    flat = bins.astype(np.int64) * n_times + times
+    size = n_bins * n_times
+    out = np.empty((n_bins, n_times, 2), dtype=np.int64)
+    out[..., 0] = np.bincount(flat, weights=y, minlength=size).reshape(n_bins, n_times)
+    out[..., 1] = np.bincount(flat, minlength=size).reshape(n_bins, n_times)
+    return out
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _hist2d_numba(bins, times, y, n_bins, n_times):
+        # laço serial: somas concorrentes na mesma célula exigiriam atomics
+        out = np.zeros((n_bins, n_times, 2), np.int64)
+        for i in range(bins.size):
+            out[bins[i], times[i], 0] += y[i]
+            out[bins[i], times[i], 1] += 1
+        return out
+
+
+def hist2d(
+    bins: np.ndarray, times: np.ndarray, y: np.ndarray, n_bins: int, n_times: int
+) -> np.ndarray:
+    """
+    Conta (eventos, total) por célula (bin, safra).
+
+    Parâmetros
+    ----------
+    bins, times : arrays de códigos inteiros em ``[0, n_bins)`` e ``[0, n_times)``
+    y           : target binário (0/1), mesmo tamanho de ``bins``
+
+    Retorna
+    -------
+    np.ndarray int64 de shape ``(n_bins, n_times, 2)``; ``[..., 0]`` são os
+    eventos e ``[..., 1]`` o total de observações.
+    """
+    bins = np.ascontiguousarray(bins, dtype=np.int64)
+    times = np.ascontiguousarray(times, dtype=np.int64)
+    y = np.ascontiguousarray(y, dtype=np.int64)
+    if njit is not None:
+        return _hist2d_numba(bins, times, y, n_bins, n_times)
+    return _hist2d_numpy(bins, times, y, n_bins, n_times)
+
+
+
+# ------------------------------------------------------------------ #
+def _hist2d_multi_numpy(codes, times, y, offsets, n_total, n_times):
+    out = np.zeros((n_total, n_times, 2), dtype=np.int64)
+    for j in range(codes.shape[1]):
+        b = codes[:, j]
+        ok = (b >= 0) & (times >= 0)
+        n_bins = (offsets[j + 1] if j + 1 < len(offsets) else n_total) - offsets[j]
+        out[offsets[j]: offsets[j] + n_bins] = _hist2d_numpy(
+            b[ok], times[ok], y[ok], n_bins, n_times
+        )
+    return out
+
+
+if njit is not None:
+
+    @njit(cache=True, parallel=True)
+    def _hist2d_multi_numba(codes, times, y, offsets, n_total, n_times, n_threads):
+        # cada thread acumula um bloco de linhas num histograma próprio
+        # (sem atomics) e os parciais são somados no fim
+        n, p = codes.shape
+        n_chunks = max(1, min(n_threads, n // 4096))
+        step = (n + n_chunks - 1) // n_chunks
+        partial = np.zeros((n_chunks, n_total, n_times, 2), np.int64)
+        for c in prange(n_chunks):
+            out = partial[c]
+            for i in range(c * step, min(n, (c + 1) * step)):
+                t = times[i]
+                if t < 0:
+                    continue
+                yi = y[i]
+                for j in range(p):
+                    b = codes[i, j]
+                    if b < 0:
+                        continue
+                    out[offsets[j] + b, t, 0] += yi
+                    out[offsets[j] + b, t, 1] += 1
+        return partial.sum(axis=0)
+
+
+def hist2d_multi(
+    codes: np.ndarray, times: np.ndarray, y: np.ndarray,
+    n_bins: np.ndarray, n_times: int,
+) -> np.ndarray:
+    """
+    ``hist2d`` para várias variáveis de uma vez.
+
+    Parâmetros
+    ----------
+    codes  : array ``(n, p)`` com o código do bin de cada variável (-1 = NaN)
+    times  : códigos de safra ``(n,)`` (-1 = NaN)
+    n_bins : número de bins de cada uma das ``p`` variáveis
+
+    Retorna
+    -------
+    np.ndarray int64 ``(sum(n_bins), n_times, 2)``; as linhas da variável ``j``
+    começam em ``np.cumsum(n_bins) - n_bins`` (mesma ordem de ``codes``).
+    """
+    n_bins = np.asarray(n_bins, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(n_bins)[:-1])).astype(np.int64)
+    n_total = int(n_bins.sum())
+    codes = np.ascontiguousarray(codes)
+    times = np.ascontiguousarray(times, dtype=np.int64)
+    y = np.ascontiguousarray(y, dtype=np.int64)
+    if njit is not None:
+        return _hist2d_multi_numba(
+            codes, times, y, offsets, n_total, n_times, get_num_threads()
+        )
+    return _hist2d_multi_numpy(codes, times, y, offsets, n_total, n_times)
+
+# ------------------------------------------------------------------ #
+def _merge_by_delta_py(count, event, non_event, er, min_delta):
+    n = count.size
+    start = np.zeros(n, np.int64)
+    if n == 0:
+        return count, event, non_event, er, start
+    w = 0
+    for r in range(1, n):
+        if abs(er[w] - er[r]) < min_delta:
+            # funde r no bin corrente e compara o resultado com o próximo
+            count[w] += count[r]
+            event[w] += event[r]
+            non_event[w] += non_event[r]
+            er[w] = event[w] / count[w]
+        else:
+            w += 1
+            count[w], event[w], non_event[w], er[w] = count[r], event[r], non_event[r], er[r]
+            start[w] = r
+    k = w + 1
+    return count[:k], event[:k], non_event[:k], er[:k], start[:k]
+
+
+if njit is not None:
+    # error_model="numpy": 0/0 vira NaN (como na divisão do pandas), sem exceção
+    _merge_by_delta_numba = njit(cache=True, error_model="numpy")(_merge_by_delta_py)
+
+
+def merge_by_delta(
+    count: np.ndarray, event: np.ndarray, non_event: np.ndarray,
+    er: np.ndarray, min_delta: float,
+):
+    """
+    Funde bins vizinhos cujo Δ event-rate é menor que `min_delta`.
+
+    Dois ponteiros numa única passada: o bin de leitura ``r`` é somado ao bin
+    corrente ``w`` enquanto ``|er[w] - er[r]| < min_delta`` (com ``er[w]``
+    recalculado após cada fusão); senão vira o novo bin corrente. Mesmo
+    resultado do laço de fusões sucessivas, sem reconstruir a tabela a cada
+    passo.
+
+    Retorna
+    -------
+    ``(count, event, non_event, event_rate, start)`` dos bins resultantes
+    (float64); ``start[k]`` é a primeira linha original do bin ``k``.
+    """
+    arrays = [np.array(a, dtype=np.float64) for a in (count, event, non_event, er)]
+    if njit is not None:
+        return _merge_by_delta_numba(*arrays, float(min_delta))
+    with np.errstate(invalid="ignore", divide="ignore"):   # 0/0 → NaN, como no pandas
+        return _merge_by_delta_py(*arrays, float(min_delta))
+
+
+# ------------------------------------------------------------------ #
+def _merge_monotonic_py(count, event, non_event, er, sign):
+    n = count.size
+    start = np.zeros(n, np.int64)
+    left = np.empty(n, np.int64)
+    right = np.empty(n, np.int64)
+    n_merges = 0
+    w = -1
+    for r in range(n):
+        w += 1
+        count[w], event[w], non_event[w], er[w] = count[r], event[r], non_event[r], er[r]
+        start[w] = r
+        # topo da pilha viola a tendência → funde com o anterior; para quando a
+        # tabela (pilha + linhas ainda não lidas) ficaria com 2 bins
+        while w >= 1 and w + n - r > 2 and sign * (er[w] - er[w - 1]) < 0:
+            left[n_merges] = start[w - 1]
+            right[n_merges] = start[w]
+            n_merges += 1
+            count[w - 1] += count[w]
+            event[w - 1] += event[w]
+            non_event[w - 1] += non_event[w]
+            er[w - 1] = event[w - 1] / count[w - 1]
+            w -= 1
+    k = w + 1
+    return (count[:k], event[:k], non_event[:k], er[:k], start[:k],
+            left[:n_merges], right[:n_merges])
+
+
+if njit is not None:
+    _merge_monotonic_numba = njit(cache=True, error_model="numpy")(_merge_monotonic_py)
+
+
+def merge_monotonic(
+    count: np.ndarray, event: np.ndarray, non_event: np.ndarray,
+    er: np.ndarray, trend: str,
+):
+    """
+    Funde bins vizinhos até o event-rate seguir `trend` ("ascending"/"descending").
+
+    Pool-adjacent-violators com pilha, O(n): cada bin lido é empilhado e,
+    enquanto viola a tendência em relação ao anterior, os dois são fundidos.
+    Equivale a fundir repetidamente o primeiro par que quebra a tendência
+    (parando com 2 bins), como fazia o laço de ``refine_bins``.
+
+    Retorna
+    -------
+    ``(count, event, non_event, event_rate, start, left, right)``: bins
+    resultantes (float64), ``start[k]`` = primeira linha original do bin ``k``
+    e, na ordem em que ocorreram, as fusões ``left[m] ← right[m]`` (linhas
+    iniciais dos dois grupos fundidos).
+    """
+    sign = 1.0 if trend == "ascending" else -1.0
+    arrays = [np.array(a, dtype=np.float64) for a in (count, event, non_event, er)]
+    if njit is not None:
+        return _merge_monotonic_numba(*arrays, sign)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return _merge_monotonic_py(*arrays, sign)
+
+
+# ------------------------------------------------------------------ #
+def _digitize_columns_numpy(X, edges, offsets, out):
+    for j in range(X.shape[1]):
+        e = edges[offsets[j]: offsets[j + 1]]
+        out[:, j] = np.searchsorted(e, X[:, j], side="right")
+    return out
+
+
+if njit is not None:
+
+    @njit(cache=True, parallel=True)
+    def _digitize_columns_numba(X, edges, offsets, out):
+        # colunas independentes → uma por thread
+        for j in prange(X.shape[1]):
+            e = edges[offsets[j]: offsets[j + 1]]
+            out[:, j] = np.searchsorted(e, X[:, j], side="right")
+        return out
+
+
+def digitize_columns(
+    X: np.ndarray, edges: list[np.ndarray], dtype=None
+) -> np.ndarray:
+    """
+    Índice do bin de cada valor, coluna a coluna.
+
+    Parâmetros
+    ----------
+    X     : matriz ``(n, p)`` float32/float64
+    edges : ``p`` arrays com os cortes internos de cada coluna (sem os
+            extremos), crescentes
+    dtype : dtype da saída (padrão: o de `X`); um inteiro pequeno evita a
+            cópia de conversão depois
+
+    Retorna
+    -------
+    np.ndarray ``(n, p)`` em ordem Fortran com
+    ``searchsorted(edges[j], X[:, j], side="right")`` — a mesma regra do
+    ``KBinsDiscretizer.transform``.
+    """
+    offsets = np.zeros(len(edges) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in edges], out=offsets[1:])
+    flat = (np.concatenate(edges) if edges else np.empty(0)).astype(np.float64)
+    X = np.asfortranarray(X)               # colunas contíguas
+    out = np.empty(X.shape, dtype=X.dtype if dtype is None else dtype, order="F")
+    if njit is not None:
+        return _digitize_columns_numba(X, flat, offsets, out)
+    return _digitize_columns_numpy(X, flat, offsets, out)
+
+
+# ------------------------------------------------------------------ #
+def _pair_separability_numpy(curves):
+    # todos os pares i < j de uma vez (mesma ordem do laço duplo)
+    i, j = np.triu_indices(curves.shape[0], k=1)
+    return float(np.abs(curves[i] - curves[j]).mean(axis=1).mean())
+
+
+if njit is not None:
+
+    # sem "nnan"/"ninf": curvas com safra vazia (NaN) propagam NaN
+    @njit(cache=True, parallel=True, error_model="numpy",
+          fastmath={"reassoc", "contract", "arcp", "nsz"})
+    def _pair_separability_numba(curves):
+        n, t = curves.shape
+        partial = np.zeros(n)            # soma das distâncias de cada linha i
+        for i in prange(n):
+            acc = 0.0
+            for j in range(i + 1, n):
+                d = 0.0
+                for k in range(t):
+                    d += abs(curves[i, k] - curves[j, k])
+                acc += d / t
+            partial[i] = acc
+        return partial.sum() / (n * (n - 1) // 2)
+
+
+def pair_separability(curves: np.ndarray) -> float:
+    """
+    Distância média absoluta entre todas as linhas de `curves` (bin × safra).
+
+    Média, sobre os pares ``i < j``, de ``mean(|curves[i] - curves[j]|)``;
+    0.0 com menos de duas linhas. Igual à versão NumPy a menos de
+    arredondamento (a ordem das somas muda).
+    """
+    curves = np.ascontiguousarray(curves, dtype=np.float64)
+    if curves.shape[0] < 2:
+        return 0.0
+    if njit is not None:
+        return float(_pair_separability_numba(curves))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return _pair_separability_numpy(curves)
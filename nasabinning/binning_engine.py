@@ -7,18 +7,112 @@ O foco está em manter a separação temporal das curvas de event rate.
 """
 from __future__ import annotations
 from typing import List, Optional, Dict
-import inspect, pandas as pd
+import hashlib, inspect, pandas as pd
+from itertools import chain
 import numpy as np
+from joblib import Parallel, delayed
 from sklearn.base import BaseEstimator, TransformerMixin
 
-from .strategies import get_strategy  # factory function (ver abaixo)
-from .refinement import refine_bins   # ainda será implementado
-from .metrics import iv               # placeholder
-
-from .temporal_stability import event_rate_by_time
-from .visualizations import plot_event_rate_stability
+from .refinement import refine_bins, regular_bins_mask
 from .utils.dtypes import search_dtypes
-from .strategies import get_strategy
+
+# strategies (optbinning), optuna_optimizer e visualizations (matplotlib) são
+# importados dentro dos métodos que os usam: `import nasabinning` fica leve
+
+# chaves de strategy_kwargs consumidas pelo fluxo Optuna (não vão à strategy)
+_OPTUNA_KWARGS = ("n_trials", "pruner", "n_jobs", "gc_after_trial", "scoring")
+# chaves de strategy_kwargs que também valem para o CategoricalBinning
+_CATEGORICAL_KWARGS = (
+    "solver", "time_limit", "prebinning_method", "max_n_prebins", "min_prebin_size",
+)
+
+
+def _drop_auxiliary_rows(summary: pd.DataFrame) -> pd.DataFrame:
+    """Remove linhas Special/Missing/Totals e bins vazios do bin_summary."""
+    return summary[regular_bins_mask(summary)]
+
+
+def _raw_row_positions(
+    raw_counts: np.ndarray, refined: pd.DataFrame, final: pd.DataFrame,
+) -> np.ndarray:
+    """
+    Posição em `final` (o bin_summary da feature) de cada linha da tabela bruta
+    passada ao ``refine_bins``; -1 se ela caiu em Special/Missing/bin vazio.
+    As fusões do ``refine_bins`` juntam linhas adjacentes somando contagens,
+    logo as contagens acumuladas dizem em que grupo cada linha bruta caiu.
+    """
+    raw_counts = np.asarray(raw_counts, dtype=np.int64)
+    group_end = np.cumsum(refined["count"].to_numpy(dtype=np.int64))
+    group = np.searchsorted(group_end, np.cumsum(raw_counts) - raw_counts, side="right")
+    position = np.full(len(refined), -1, dtype=np.int64)
+    position[refined.index.get_indexer(final.index)] = np.arange(len(final))
+    return position[np.minimum(group, len(refined) - 1)]
+
+
+def _fit_numeric_column(
+    X_col: pd.DataFrame,
+    y: pd.Series,
+    strat_kwargs: dict,
+    monotonic: str | None,
+    min_event_rate_diff: float,
+    time_col: str | None,
+    check_stability: bool,
+):
+    """
+    Ajusta uma feature numérica → (strategy, bin_summary refinado, posição no
+    resumo de cada bin regular do OptimalBinning).
+    """
+    from .strategies import get_strategy
+
+    strat = get_strategy("supervised", **strat_kwargs)
+    strat.fit(X_col, y, monotonic_trend=monotonic)
+
+    # passo de “refine_bins” usando min_event_rate_diff
+    summary = refine_bins(
+        strat.bin_summary_,
+        min_er_delta=min_event_rate_diff,
+        trend=monotonic,
+        time_col=time_col,
+        check_stability=check_stability,
+    )
+
+    # ── limpa linhas indesejadas ───────────────────────────────────────
+    final = _drop_auxiliary_rows(summary)
+    raw = strat.bin_summary_
+    n_regular = len(strat.models_[X_col.columns[0]].splits) + 1
+    return strat, final, _raw_row_positions(raw["Count"].to_numpy()[:n_regular], summary, final)
+
+
+def _fit_categorical_column(
+    X_col: pd.DataFrame,
+    y: pd.Series,
+    max_bins: int,
+    min_event_rate_diff: float,
+    cat_kwargs: dict,
+):
+    """
+    Ajusta uma feature categórica → (strategy, bin_summary refinado, posição
+    no resumo de cada linha do ``bin_summary_`` da strategy).
+    """
+    from .strategies.categorical import CategoricalBinning
+
+    strat = CategoricalBinning(max_bins=max_bins, **cat_kwargs)
+    strat.fit(X_col, y)
+
+    # resumo original do CategoricalBinning, que já contém colunas:
+    # ["variable", "bin", "count", "event", "non_event", "event_rate", ...]
+    # aplica refine_bins, exatamente como no bloco numérico
+    summary = refine_bins(
+        strat.bin_summary_,
+        min_er_delta=min_event_rate_diff,
+        trend=None,         # para categorias normalmente não impomos monotonicidade
+        time_col=None,      # sem “safra” para binagem categórica
+        check_stability=False
+    )
+
+    # ── limpa linhas indesejadas ───────────────────────────────────────
+    final = _drop_auxiliary_rows(summary).sort_values("event_rate", ascending=False)
+    return strat, final, _raw_row_positions(strat.bin_summary_["count"], summary, final)
 
 
 class NASABinner(BaseEstimator, TransformerMixin):
@@ -31,10 +125,15 @@ class NASABinner(BaseEstimator, TransformerMixin):
         monotonic: str | None = None,
         check_stability: bool = False,
         use_optuna: bool = False,
+        joint_optuna: bool = False,
         time_col: str | None = None,
         force_categorical: list[str] | None = None,
         force_numeric: list[str] | None = None,
         strategy_kwargs: dict | None = None,
+        n_jobs: int | None = -1,
+        study_storage: str | None = None,
+        study_prefix: str = "nasabinner",
+        cache_dir: str | None = None,
     ):
         self.strategy = strategy
         self.max_bins = max_bins                #  ←  guarda
@@ -42,19 +141,15 @@ class NASABinner(BaseEstimator, TransformerMixin):
         self.monotonic = monotonic
         self.check_stability = check_stability
         self.use_optuna = use_optuna
+        self.joint_optuna = joint_optuna        # um estudo multiobjetivo p/ todas
         self.time_col = time_col
-        self.force_categorical = force_categorical or []
-        self.force_numeric = force_numeric or []
-
-        # ——— normaliza strategy_kwargs ———
-        strategy_kwargs = strategy_kwargs or {}
-        if "strategy_kwargs" in strategy_kwargs:
-            nested = strategy_kwargs.pop("strategy_kwargs")
-            for k, v in nested.items():
-                strategy_kwargs.setdefault(k, v)
-
-        # garante que max_bins chegue à strategy caso ela use
-        strategy_kwargs.setdefault("max_bins", self.max_bins)
+        self.force_categorical = force_categorical
+        self.force_numeric = force_numeric
+        self.n_jobs = n_jobs                    # paralelismo por feature (joblib)
+        self.study_storage = study_storage      # ex.: "sqlite:///nasa.db" (estudos em série)
+        self.study_prefix = study_prefix
+        self.cache_dir = cache_dir              # joblib.Memory dos ajustes por coluna
+        # guardado como recebido (clone/pickle); normalizado em fit()
         self.strategy_kwargs = strategy_kwargs
 
         # internos
@@ -62,6 +157,27 @@ class NASABinner(BaseEstimator, TransformerMixin):
         self.bin_summary = None
 
 
+    def _resolve_strategy_kwargs(self) -> dict:
+        """Achata `strategy_kwargs` aninhado sem alterar o parâmetro original."""
+        kwargs = dict(self.strategy_kwargs or {})
+        nested = kwargs.pop("strategy_kwargs", None) or {}
+        for k, v in nested.items():
+            kwargs.setdefault(k, v)
+
+        # garante que max_bins chegue à strategy caso ela use
+        kwargs.setdefault("max_bins", self.max_bins)
+        return kwargs
+
+
+    def _study_name(self, dtypes: pd.Series, tag: str) -> str | None:
+        """Nome estável do estudo Optuna para o schema `dtypes` (só com `study_storage`)."""
+        if self.study_storage is None:
+            return None
+        # hash() do Python é salgado por processo; md5 mantém o nome entre execuções
+        schema = ";".join(f"{c}:{t}" for c, t in dtypes.items()).encode()
+        return f"{self.study_prefix}-{tag}-{hashlib.md5(schema).hexdigest()[:8]}"
+
+
     def fit(self, X: pd.DataFrame, y: pd.Series, *, time_col: str | None = None):
         """Treina o binner. Se use_optuna=True, otimiza coluna-a-coluna."""
         assert isinstance(X, pd.DataFrame), "X deve ser um DataFrame"
@@ -69,153 +185,197 @@ class NASABinner(BaseEstimator, TransformerMixin):
 
         time_col = time_col or self.time_col
         self.time_col = time_col            # garante persistência
+        strategy_kwargs = self._resolve_strategy_kwargs()
 
         # ========= 1. Detectar tipos (substitui Woodwork) =============
+        # X é lido diretamente (sem concatenar y só para removê-lo depois)
         num_cols, cat_cols = search_dtypes(
-            pd.concat([X, y.rename("target")], axis=1),
-            target_col="target",
+            X,
+            target_col=None,
             limite_categorico=50,
             force_categorical=self.force_categorical,
             verbose=False
         )
+        # a safra só indexa o tempo; não é feature a ser binada
+        if time_col is not None:
+            num_cols = [c for c in num_cols if c != time_col]
+            cat_cols = [c for c in cat_cols if c != time_col]
         # armazenar para describe_schema()
         self.numeric_cols_ = num_cols
         self.cat_cols_     = cat_cols
-        self.ignored_cols_ = [c for c in X.columns if c not in num_cols + cat_cols]
+        used = set(chain(num_cols, cat_cols))   # lookup O(1) por coluna
+        self.ignored_cols_ = [c for c in X.columns if c not in used]
 
         # ========= 2. Fluxo com Optuna (por feature) ==================
         if self.use_optuna:
-            from .optuna_optimizer import optimize_bins
-
-            n_trials = self.strategy_kwargs.pop("n_trials", 20)
+            from .optuna_optimizer import optimize_bins, optimize_bins_joint
+
+            n_trials = strategy_kwargs.get("n_trials", 20)
+            pruner = strategy_kwargs.get("pruner")   # só o estudo conjunto tem passos p/ podar
+            # paralelismo entre trials (study.optimize) e função de score
+            trial_kwargs = dict(
+                n_jobs=strategy_kwargs.get("n_jobs", 1),
+                gc_after_trial=strategy_kwargs.get("gc_after_trial", True),
+                scoring=strategy_kwargs.get("scoring", "temporal"),
+            )
+            # scores de funções diferentes não podem dividir o mesmo estudo salvo
+            suffix = "" if trial_kwargs["scoring"] == "temporal" else f"-{trial_kwargs['scoring']}"
             base_kwargs = dict(
                 strategy=self.strategy,
                 min_event_rate_diff=self.min_event_rate_diff,
                 monotonic=self.monotonic,
                 check_stability=self.check_stability,
+                cache_dir=self.cache_dir,       # trials e ajuste final reusam o cache
             )
-            self._per_feature_binners = {}
-            self.best_params_ = {}
+            cols = [*num_cols, *cat_cols]
+            time_vals = X[time_col] if time_col else None
 
-            for col in num_cols + cat_cols:
-                time_vals = X[time_col] if time_col else None
-                best, b_col = optimize_bins(
-                    X[[col]], y,
+            if self.joint_optuna and len(cols) > 1:
+                # um único estudo: warm-up do TPE compartilhado, poda por coluna
+                self.best_params_, self._per_feature_binners = optimize_bins_joint(
+                    X[cols], y,
                     time_col=time_col,
                     time_values=time_vals,
                     n_trials=n_trials,
+                    pruner=pruner,
+                    storage=self.study_storage,
+                    study_name=self._study_name(X.dtypes[cols], "joint" + suffix),
+                    **trial_kwargs,
                     **base_kwargs
                 )
-                self._per_feature_binners[col] = b_col
-                self.best_params_[col] = best
+            else:
+                # cada feature é um estudo independente → roda em paralelo (loky);
+                # SQLite não aguenta escritas concorrentes de vários processos:
+                # com ele os estudos rodam em sequência (use um RDB p/ paralelo)
+                sqlite = str(self.study_storage or "").startswith("sqlite")
+                results = Parallel(
+                    n_jobs=1 if sqlite else self.n_jobs, backend="loky", batch_size=1,
+                )(
+                    delayed(optimize_bins)(
+                        X[[col]], y,
+                        time_col=time_col,
+                        time_values=time_vals,
+                        n_trials=n_trials,
+                        storage=self.study_storage,
+                        study_name=self._study_name(X.dtypes[[col]], col + suffix),
+                        **trial_kwargs,
+                        **base_kwargs
+                    )
+                    for col in cols
+                )
+                self._per_feature_binners = {}
+                self.best_params_ = {}
+                for col, (best, b_col) in zip(cols, results):
+                    self._per_feature_binners[col] = b_col
+                    self.best_params_[col] = best
 
             # monta bin_summary global (já é DataFrame)
             self.bin_summary = pd.concat(
                 [b.bin_summary for b in self._per_feature_binners.values()],
-                ignore_index=True
+                ignore_index=True, sort=False, copy=False,
             )
             # calcula IV global (soma dos IVs individuais)
-            from .metrics import iv
-            self.iv_ = self.bin_summary.groupby("variable").apply(iv).sum()
+            self.iv_ = float(np.fromiter(
+                (b.iv_ for b in self._per_feature_binners.values()),
+                dtype=np.float64, count=len(self._per_feature_binners),
+            ).sum())
+            self._finish_fit()
             return self
 
         # ========= 3. Fluxo tradicional (sem Optuna) ======================
-        self._per_feature_binners = {}    # dicionário de binners por feature
-        self.bin_summary       = []      # lista temporária para coletar cada DataFrame
-
-        # ────────── fluxo numérico ──────────
-        for col in num_cols:
-            strat = get_strategy("supervised", **self.strategy_kwargs)
-            strat.fit(X[[col]], y, monotonic_trend=self.monotonic)
-
-            # passo de “refine_bins” usando min_event_rate_diff
-            summary = refine_bins(
-                strat.bin_summary_,
-                min_er_delta=self.min_event_rate_diff,
-                trend=self.monotonic,
-                time_col=time_col,
-                check_stability=self.check_stability,
+        strat_kwargs = {
+            k: v for k, v in strategy_kwargs.items() if k not in _OPTUNA_KWARGS
+        }
+        cat_kwargs = {k: strat_kwargs[k] for k in _CATEGORICAL_KWARGS if k in strat_kwargs}
+        # uma tarefa por coluna; threads → sem pickling de X, e o solver
+        # (C++/NumPy) libera o GIL durante o ajuste
+        fit_num, fit_cat = _fit_numeric_column, _fit_categorical_column
+        if self.cache_dir is not None:
+            # memoiza em disco por (dados da coluna, y, hiperparâmetros)
+            from joblib import Memory
+            memory = Memory(self.cache_dir, verbose=0)
+            fit_num, fit_cat = memory.cache(fit_num), memory.cache(fit_cat)
+
+        tasks = [
+            delayed(fit_num)(
+                X[[col]], y, strat_kwargs, self.monotonic,
+                self.min_event_rate_diff, time_col, self.check_stability,
             )
+            for col in num_cols
+        ] + [
+            delayed(fit_cat)(X[[col]], y, self.max_bins, self.min_event_rate_diff, cat_kwargs)
+            for col in cat_cols
+        ]
+        results = Parallel(n_jobs=self.n_jobs, prefer="threads")(tasks)
 
-            # ── limpa linhas indesejadas ───────────────────────────────────────
-            summary = summary[
-                (summary["count"] > 0) &
-                (~summary["bin"].astype(str).str.lower().isin(["total", "special", "missing"])) &
-                (summary["bin"] != summary["variable"]) &        # remove total-geral
-                (summary["bin"] != "")
-            ].reset_index(drop=True)
-
+        self._per_feature_binners = {}    # dicionário de binners por feature
+        self._raw_rows_ = {}              # linha bruta da strategy → linha do resumo
+        summaries: list[pd.DataFrame] = []  # um DataFrame por feature, concatenados ao final
+        for col, (strat, summary, raw_rows) in zip(chain(num_cols, cat_cols), results):
             self._per_feature_binners[col] = strat
-            self.bin_summary.append(summary)
-
-        # ────────── fluxo categórico ────────
-        for col in cat_cols:
-            
-            from .strategies.categorical import CategoricalBinning
-            
-            strat = CategoricalBinning(
-                max_bins=self.max_bins
-                )
-
-            strat.fit(X[[col]], y)
-
-            # resumo original do CategoricalBinning, que já contém colunas:
-            # ["variable", "bin", "count", "event", "non_event", "event_rate", ...]
-            summary = strat.bin_summary_
-
-            # aplica refine_bins, exatamente como fizemos no bloco numérico
-            summary = refine_bins(
-                summary,
-                min_er_delta=self.min_event_rate_diff,
-                trend=None,         # para categorias normalmente não impomos monotonicidade
-                time_col=None,      # sem “safra” para binagem categórica
-                check_stability=False
-            )
+            self._raw_rows_[col] = raw_rows
+            summaries.append(summary)
 
-            # ── limpa linhas indesejadas ───────────────────────────────────────
-            summary = summary[
-                (summary["count"] > 0) &
-                (~summary["bin"].astype(str).str.lower().isin(["total", "special", "missing"])) &
-                (summary["bin"] != summary["variable"]) &        # remove total-geral
-                (summary["bin"] != "")
-            ].reset_index(drop=True)
+        # ───── concatena tudo num único DataFrame ─────────────────────────
+        self.bin_summary = pd.concat(summaries, ignore_index=True, sort=False, copy=False)
 
-            summary = summary.sort_values("event_rate", ascending=False).reset_index(drop=True)
+        # IV global = soma dos IVs já calculados pelo refine_bins de cada feature
+        self.iv_ = float(np.fromiter(
+            (summary.attrs["iv"] for summary in summaries),
+            dtype=np.float64, count=len(summaries),
+        ).sum())
 
-            self._per_feature_binners[col] = strat
-            self.bin_summary.append(summary)
+        self._finish_fit()
+        return self
 
-        # ───── concatena tudo num único DataFrame ─────────────────────────
-        self.bin_summary = pd.concat(self.bin_summary, ignore_index=True)
 
-        # IV global = soma dos IVs individuais
-        from .metrics import iv
-        self.iv_ = self.bin_summary.groupby("variable").apply(iv).sum()
+    # ----------------------------------------------------------------
+    def _finish_fit(self) -> None:
+        """Pré-computa o que `transform` consultaria a cada chamada."""
+        # plano fixo (coluna, transform, aceita return_woe?) → transform só
+        # itera uma tupla; inspect.signature é caro e roda uma vez por feature.
+        # Métodos ligados (e não código gerado via exec) mantêm o objeto picklável.
+        self._transform_plan = tuple(
+            (col, b.transform, "return_woe" in inspect.signature(b.transform).parameters)
+            for col, b in self._per_feature_binners.items()
+        )
 
-        return self
+        # linhas de cada variável agrupadas uma vez (sem filtro booleano por consulta)
+        self._var_groups_ = dict(tuple(self.bin_summary.groupby("variable", sort=False)))
+        # rótulos por variável montados já no fit: plots só indexam arrays
+        self._code_label_cache = {var: self._compute_label_array(var) for var in self._var_groups_}
 
 
     # ----------------------------------------------------------------
     def transform(self, X: pd.DataFrame, *, return_woe: bool = False):
-        out = {}
-        for col, b in self._per_feature_binners.items():
-            sig = inspect.signature(b.transform)
-            kw  = {"return_woe": return_woe} if "return_woe" in sig.parameters else {}
-            out[col] = b.transform(X[[col]], **kw)[col]
-        return pd.DataFrame(out, index=X.index)
+        """
+        Aplica os binners às features treinadas presentes em `X`.
+
+        Colunas treinadas ausentes de `X` são ignoradas (scoring de um
+        subconjunto das features); se nenhuma estiver presente, KeyError.
+        """
+        present = X.columns
+        woe_kw = {"return_woe": return_woe}
+        results = {
+            col: fn(X[col].to_frame(), **(woe_kw if takes_woe else {}))[col].to_numpy()
+            for col, fn, takes_woe in self._transform_plan
+            if col in present
+        }
+        if not results:
+            raise KeyError("Nenhuma das features treinadas está presente em X.")
+        return pd.DataFrame(results, index=X.index, copy=False)
 
 
     # ----------------------------------------------------------------
     def describe_schema(self) -> pd.DataFrame:
         """Resumo simples do papel de cada coluna."""
-        records = []
-        for col in self.numeric_cols_:
-            records.append({"col": col, "tipo": "numeric"})
-        for col in self.cat_cols_:
-            records.append({"col": col, "tipo": "categorical"})
-        for col in getattr(self, "ignored_cols_", []):
-            records.append({"col": col, "tipo": "ignored"})
-        return pd.DataFrame(records)
+        groups = (
+            (self.numeric_cols_, "numeric"),
+            (self.cat_cols_, "categorical"),
+            (getattr(self, "ignored_cols_", []), "ignored"),
+        )
+        records = [(col, tipo) for cols, tipo in groups for col in cols]
+        return pd.DataFrame.from_records(records, columns=["col", "tipo"])
 
     # ------------------------------------------------------------------ #
     def fit_transform(
@@ -248,7 +408,8 @@ class NASABinner(BaseEstimator, TransformerMixin):
 
         # ── construir mapeamento ────────────────────────────────────────
         if enc_type == "woe":                     # OptimalBinning
-            mapping = encoder.splits["mapping"]   # dict categoria → bin
+            # tabela código → bin do fit: categoria (pós rare-merge) → rótulo
+            mapping = dict(zip(binner_col._fit_dtype.categories, binner_col._code_to_bin))
         elif enc_type == "ordinal":               # fallback
             mapping = encoder.mapping[0]["mapping"]  # dict categoria → código
         else:
@@ -280,7 +441,8 @@ class NASABinner(BaseEstimator, TransformerMixin):
         Calcula event-rate por bin ao longo das safras.
 
         Retorna um DataFrame pivotado:
-            index   → (variable, bin_code_int)
+            index   → (variable, bin_code_int) – código 0..k-1 = posição do
+                      bin nas linhas de `bin_summary` da variável
             columns → valores únicos de `time_col` (yyyymm)
             values  → event_rate (0-1)
         """
@@ -291,81 +453,124 @@ class NASABinner(BaseEstimator, TransformerMixin):
                 "Inclua a coluna de safra no DataFrame passado."
             )
         # -------------------------------------------------------------- #
-        # 1) Gera DataFrame com códigos de bin para cada variável
+        # 1) Códigos de bin de todas as variáveis num único buffer (n, p)
         # -------------------------------------------------------------- #
-        if getattr(self, "_fitted_strategy", None) is not None:
-            # modo tradicional (um único strategy)
-            X_bins = self._fitted_strategy.transform(X.drop(columns=[time_col], errors="ignore"))
-        elif hasattr(self, "_per_feature_binners"):
-            # modo Optuna por feature
-            parts = []
-            for col, binner_col in self._per_feature_binners.items():
-                code = binner_col._fitted_strategy.transform(X[[col]]).rename(columns={col: col})
-                parts.append(code)
-            X_bins = pd.concat(parts, axis=1)
-        else:
+        if not getattr(self, "_per_feature_binners", None):
             raise RuntimeError("Binner ainda não foi treinado.  Chame .fit() antes.")
 
+        variables = list(self._per_feature_binners)
+        # int16: comporta -1 (fora dos bins) e bem mais bins do que qualquer max_bins usual
+        codes = np.empty((len(X), len(variables)), dtype=np.int16)
+        n_bins = []
+        for j, col in enumerate(variables):
+            codes[:, j] = self._bin_codes(col, X[col])
+            n_bins.append(len(self._var_groups_.get(col, ())))
+
         # -------------------------------------------------------------- #
-        # 2) Concatena target e safra
+        # 2) Códigos inteiros compactos para safra
         # -------------------------------------------------------------- #
-        df_aux = pd.concat(
-            [X_bins, y.rename("target"), X[time_col]],
-            axis=1,
-        )
+        from ._kernels import hist2d_multi
+
+        t_codes, t_uniques = pd.factorize(X[time_col], sort=True)
+        target = y.to_numpy()
+        n_times = len(t_uniques)
 
         # -------------------------------------------------------------- #
-        # 3) Calcula event-rate por (var, bin, safra)
+        # 3) Eventos/total por (var, bin, safra) – uma única passada em (n, p)
         # -------------------------------------------------------------- #
-        out = []
-        for var in X_bins.columns:
-            grp = (
-                df_aux.groupby([time_col, var])["target"]
-                .agg(["sum", "count"])
-                .reset_index()
-                .rename(columns={"sum": "event", "count": "total", var: "bin"})
-            )
-            grp["event_rate"] = grp["event"] / grp["total"]
-            grp["variable"] = var
-            out.append(grp)
+        hist = hist2d_multi(codes, t_codes, target, n_bins, n_times)
+        total = hist[..., 1]
+
+        # linhas do histograma: variável j ocupa [offset_j, offset_j + n_bins_j)
+        n_bins = np.asarray(n_bins, dtype=np.int64)
+        var_of_row = np.repeat(np.arange(len(variables)), n_bins)
+        bin_of_row = np.arange(len(var_of_row)) - np.repeat(np.cumsum(n_bins) - n_bins, n_bins)
 
-        df_rate = pd.concat(out, ignore_index=True)
+        # variáveis em ordem alfabética; bins sem observação são descartados
+        rank = np.empty(len(variables), dtype=np.int64)
+        rank[np.argsort(np.asarray(variables, dtype=object), kind="stable")] = np.arange(len(variables))
+        rows = np.flatnonzero(total.sum(axis=1))
+        rows = rows[np.argsort(rank[var_of_row[rows]], kind="stable")]
+        seen = total.any(axis=0)
 
         # -------------------------------------------------------------- #
         # 4) Pivot final (index = (variable, bin), columns = safra)
         # -------------------------------------------------------------- #
-        pivot = (
-            df_rate.pivot_table(
-                index=["variable", "bin"],
-                columns=time_col,
-                values="event_rate",
-                fill_value=0,
-            )
-            .sort_index(axis=1)
-            .sort_index()
+        bins = bin_of_row[rows]
+        # código do bin = posição do valor ordenado (uint8 p/ max_bins usuais)
+        code_dtype = np.min_scalar_type(max(int(bins.max(initial=0)), 0))
+        index = pd.MultiIndex.from_arrays(
+            [np.asarray(variables, dtype=object)[var_of_row[rows]],
+             bins.astype(code_dtype)],
+            names=["variable", "bin"],
+        )
+        rate = hist[rows][:, seen, 0] / np.maximum(total[rows][:, seen], 1)
+        pivot = pd.DataFrame(
+            rate,
+            index=index,
+            columns=pd.Index(t_uniques[seen], name=time_col),
         )
         return pivot
 
 
-    def _bin_code_to_label(self, var: str) -> dict:
+    def _bin_code_to_label(self, var: str) -> np.ndarray:
+        """
+        Retorna um array ``labels`` tal que ``labels[bin_code]`` é o intervalo
+        textual do bin na variável `var`. Pré-computado no ``fit`` para todas
+        as variáveis (``_code_label_cache``); as demais são calculadas sob demanda.
+        """
+        cache = self.__dict__.setdefault("_code_label_cache", {})
+        labels = cache.get(var)
+        if labels is None:
+            labels = cache[var] = self._compute_label_array(var)
+        return labels
+
+    def _bin_codes(self, var: str, x: pd.Series) -> np.ndarray:
         """
-        Retorna um dicionário {bin_code -> intervalo_textual} para a variável `var`.
-        Funciona tanto se o código estiver salvo como int, float ou index posicional.
+        Código de bin de cada valor de `x` = posição da linha correspondente
+        em ``_var_groups_[var]`` (-1 para Missing/Special ou categoria sem linha).
         """
-        bs = self.bin_summary.loc[self.bin_summary["variable"] == var].copy()
+        strat = self._per_feature_binners[var]
+        if isinstance(strat, NASABinner):       # caminho Optuna: binner por feature
+            return strat._bin_codes(var, x)
+
+        # linha bruta (bin do OptimalBinning / código da strategy) → linha do
+        # resumo, já com as fusões do refine_bins (ver _raw_row_positions)
+        raw_rows = self._raw_rows_[var]
+        models = getattr(strat, "models_", None)
+        if models is not None and var in models:
+            # numérico: bin regular do OptimalBinning direto pelos splits
+            values = x.to_numpy(dtype=np.float64)
+            codes = raw_rows[np.searchsorted(models[var].splits, values, side="right")]
+            codes[np.isnan(values)] = -1
+            return codes
+
+        # categórico: rótulo devolvido pelo transform → linha do bin_summary_
+        lookup = {}
+        for k, label in enumerate(strat.bin_summary_["bin"].astype(str)):
+            lookup.setdefault(label, k)
+        raw = strat.transform(x.to_frame())[var].astype(str).map(lookup)
+        codes = np.full(len(raw), -1, dtype=np.int64)
+        found = raw.notna().to_numpy()
+        codes[found] = raw_rows[raw.to_numpy()[found].astype(np.intp)]
+        return codes
+
+    def _compute_label_array(self, var: str) -> np.ndarray:
+        bs = self._var_groups_.get(var, self.bin_summary.iloc[:0])
+        names = bs["bin"].astype(str).to_numpy(dtype=object)
 
         # Tenta adivinhar qual coluna guarda o código interno
         for cand in ("bin_code", "bin_code_float", "bin_code_int"):
             if cand in bs.columns:
-                key_col = cand
-                break
+                codes = bs[cand].to_numpy(dtype=float)
+                if np.all((codes >= 0) & (codes == codes.round())):
+                    break
         else:  # fallback: usar a posição dos bins
-            bs = bs.reset_index(drop=True)
-            bs["__pos__"] = bs.index.astype(float)
-            key_col = "__pos__"
+            codes = np.arange(len(bs))
 
-        # Garante que as chaves sejam do mesmo tipo que chegará no pivot
-        return {bs[key_col].iloc[i]: str(bs["bin"].iloc[i]) for i in range(len(bs))}
+        labels = np.empty(int(codes.max(initial=-1)) + 1, dtype=object)
+        labels[codes.astype(np.intp)] = names
+        return labels
 
     # ------------------------------------------------------------------ #
     def plot_event_rate_stability(self, pivot, **kwargs):
@@ -6,43 +6,68 @@ Executa várias configurações de NASABinner e consolida métricas
 from __future__ import annotations
 import pandas as pd
 from typing import List, Dict, Any
+from joblib import Parallel, delayed, effective_n_jobs
 from .binning_engine import NASABinner
 
 
+def _run_config(cfg: Dict[str, Any], X: pd.DataFrame, y: pd.Series,
+                time_col: str | None, cache_dir: str | None,
+                inner_jobs: int | None) -> Dict[str, Any]:
+    """Ajusta uma configuração (executado em um worker do joblib)."""
+    cfg = dict(cfg)                     # não altera a lista do usuário
+    name = cfg.pop("name", None) or cfg.get("strategy", "binner")
+    binner = NASABinner(**{"cache_dir": cache_dir, "n_jobs": inner_jobs, **cfg})
+    binner.fit(X, y, time_col=time_col)
+    return dict(
+        name=name,
+        strategy=binner.strategy,
+        iv=binner.iv_,
+        n_bins=len(binner.bin_summary),
+        psi=binner.bin_summary.attrs.get("psi_over_time", None),
+        binner=binner,
+    )
+
+
 class BinComparator:
-    def __init__(self, configs: List[Dict[str, Any]], time_col: str | None = None):
+    def __init__(
+        self,
+        configs: List[Dict[str, Any]],
+        time_col: str | None = None,
+        cache_dir: str | None = None,
+        n_jobs: int | None = -1,
+    ):
         self.configs = configs
         self.time_col = time_col
+        self.cache_dir = cache_dir    # compartilhado entre as configurações
+        self.n_jobs = n_jobs          # configurações ajustadas em paralelo (loky)
         self.results_ = []
 
     # -------------------------------------------------------------- #
     def fit_compare(self, X: pd.DataFrame, y: pd.Series):
-        for cfg in self.configs:
-            name = cfg.pop("name", None) or cfg.get("strategy", "binner")
-            binner = NASABinner(**cfg)
-            binner.fit(X, y, time_col=self.time_col)
-            self.results_.append(
-                dict(
-                    name=name,
-                    strategy=binner.strategy,
-                    iv=binner.iv_,
-                    n_bins=len(binner._bin_summary_),
-                    psi=binner._bin_summary_.attrs.get("psi_over_time", None),
-                    binner=binner,
-                )
+        # X/y grandes são memmapped pelo joblib em vez de copiados por worker.
+        # Pool externo paralelo → binners internos sequenciais (n_jobs=1), sem
+        # processos × threads disputando a CPU; "n_jobs" na config prevalece.
+        inner_jobs = 1 if effective_n_jobs(self.n_jobs) != 1 else -1
+        self.results_.extend(
+            Parallel(n_jobs=self.n_jobs, backend="loky")(
+                delayed(_run_config)(cfg, X, y, self.time_col, self.cache_dir, inner_jobs)
+                for cfg in self.configs
             )
+        )
         return pd.DataFrame(self.results_).set_index("name")
 
     # -------------------------------------------------------------- #
     def to_excel(self, path: str):
         if not self.results_:
             raise RuntimeError("Run fit_compare first.")
-        with pd.ExcelWriter(path) as writer:
-            summary = self.fit_summary()
-            summary.to_excel(writer, sheet_name="summary")
+        from .utils.excel import excel_writer, write_frame
+
+        # uma aba por vez, linha a linha (constant_memory quando há XlsxWriter)
+        with excel_writer(path) as writer:
+            write_frame(writer, self.fit_summary(), "summary")
             # salva cada bin table em aba própria
             for res in self.results_:
-                res["binner"]._bin_summary_.to_excel(writer, sheet_name=res["name"][:31])
+                write_frame(writer, res["binner"].bin_summary, res["name"][:31])
 
     def fit_summary(self) -> pd.DataFrame:
         if not self.results_:
@@ -13,13 +13,22 @@ def iv(bin_tbl: pd.DataFrame,
        col_event: str = "event",
        col_non_event: str = "non_event") -> float:
     """Calcula Information Value a partir de tabela de bins."""
-    evt = bin_tbl[col_event].values
-    non = bin_tbl[col_non_event].values
-    evt_prop = evt / evt.sum()
-    non_prop = non / non.sum()
-    woe = np.log(np.clip(evt_prop, 1e-9, None) /
-                 np.clip(non_prop, 1e-9, None))
-    return float(np.sum((evt_prop - non_prop) * woe))
+    evt = bin_tbl[col_event].to_numpy(dtype=np.float64)
+    non = bin_tbl[col_non_event].to_numpy(dtype=np.float64)
+    # chamado a cada trial do Optuna: 3 arrays temporários e o resto in-place
+    # (mesma aritmética de log(clip(p_e)/clip(p_n)), sem as cópias do clip)
+    evt_sum = evt.sum()
+    non_sum = non.sum()
+    if evt_sum == 0 or non_sum == 0:
+        # sem eventos (ou sem não-eventos) não há separação: IV 0, não NaN
+        return 0.0
+    evt_prop = evt / evt_sum
+    non_prop = non / non_sum
+    diff = evt_prop - non_prop
+    woe = np.maximum(evt_prop, 1e-9, out=evt_prop)
+    np.divide(woe, np.maximum(non_prop, 1e-9, out=non_prop), out=woe)
+    np.log(woe, out=woe)
+    return float(np.multiply(diff, woe, out=diff).sum())
 
 
 def psi(df_bins: pd.DataFrame,
@@ -42,6 +51,17 @@ def psi(df_bins: pd.DataFrame,
         exp = df_bins.loc[df_bins[by] == first, col_event_rate].values
         act = df_bins.loc[df_bins[by] == last,  col_event_rate].values
 
-    exp = np.clip(exp, 1e-9, None)
-    act = np.clip(act, 1e-9, None)
-    return float(np.sum((act - exp) * np.log(act / exp)))
+    return _psi_arrays(exp, act)
+
+
+def _psi_arrays(exp: np.ndarray, act: np.ndarray) -> float:
+    """Núcleo de `psi` sobre os vetores esperado/observado."""
+    # piso em cópias float64 (não altera a entrada) e o resto in-place:
+    # um único temporário em vez dos três de (act - exp) * log(act / exp)
+    exp = np.maximum(np.asarray(exp, dtype=np.float64), 1e-9)
+    act = np.maximum(np.asarray(act, dtype=np.float64), 1e-9)
+    diff = act - exp
+    np.divide(act, exp, out=act)
+    np.log(act, out=act)
+    diff *= act
+    return float(diff.sum())
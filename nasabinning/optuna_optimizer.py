@@ -2,119 +2,285 @@
 optuna_optimizer.py
 Busca hiperparâmetros ótimos para NASABinner via Optuna.
 
-Função principal
-----------------
+Funções principais
+------------------
 optimize_bins(
     X, y, *, time_col=None, time_values=None, n_trials=20,
-    alpha=0.7, beta=0.2, gamma=0.1, **base_kwargs)
+    alpha=0.7, beta=0.2, gamma=0.1, storage=None,
+    study_name=None, load_if_exists=True, scoring="temporal", **base_kwargs)
 → (best_params: dict, fitted_binner: NASABinner)
 
+optimize_bins_joint(X, y, *, cols=None, ...)
+→ (best_params: {col: dict}, fitted_binners: {col: NASABinner})
+
 O Optuna apenas ajusta os hiperparâmetros do OptimalBinning. O score retornado
-pelo ``_objective`` prioriza a separabilidade temporal das curvas por safra,
-computada por ``temporal_separability_score`` e ponderada com IV e KS segundo:
+pelo ``_objective`` prioriza a separabilidade temporal das curvas por safra
+(mesma métrica de ``temporal_separability_score``), ponderada com IV e KS segundo:
 
 ``score = α * separabilidade + β * IV + γ * KS``
 
-onde ``α`` > ``β`` e ``γ`` (valores padrão: 0.7, 0.2 e 0.1).
+onde ``α`` > ``β`` e ``γ`` (valores padrão: 0.7, 0.2 e 0.1). Com
+``scoring="iv_psi"`` o score passa a ser ``IV − 0.5·PSI − 0.01·n_bins``.
+
+Em ``optimize_bins`` cada trial é um único ajuste do OptimalBinning seguido do
+score: não há valor intermediário antes do trabalho caro, logo não há poda.
+
+``optimize_bins_joint`` roda um único estudo para todas as features: cada trial
+sugere os parâmetros de todas elas, o warm-up do TPE é amortizado no schema
+inteiro e a soma parcial dos scores é podada coluna a coluna.
 """
 from __future__ import annotations
 
-from typing import Any, Tuple, Optional
+from typing import Any, Literal, Tuple, Optional
 
+import numpy as np
 import optuna
 import pandas as pd
 import logging
+import pickle
+import threading
+import warnings
+from collections import OrderedDict
 
 from .binning_engine import NASABinner
-from .temporal_stability import (
-    temporal_separability_score,
-    event_rate_by_time,
-    ks_over_time,
-)
+from .temporal_stability import _separability_from_curves, ks_over_time, psi_over_time
 
 logger = logging.getLogger(__name__)
 
+Scoring = Literal["temporal", "iv_psi"]
+_SCORINGS = ("temporal", "iv_psi")
+
 
 # --------------------------------------------------------------------------- #
-def _objective(
-    trial: optuna.Trial,
-    X: pd.DataFrame,
-    y: pd.Series,
-    base_kwargs: dict[str, Any],
-    time_col: Optional[str],
-    time_values: Optional[pd.Series],
-    alpha: float,
-    beta: float,
-    gamma: float,
-) -> float:
-    """Função objetivo usada pelo Optuna."""
-    params = {
-        "max_bins": trial.suggest_int("max_bins", 3, 10),
-        "min_bin_size": trial.suggest_float("min_bin_size", 0.01, 0.1),
+def _suggest_params(trial: optuna.Trial, prefix: str = "") -> dict[str, Any]:
+    """Espaço de busca; `prefix` separa os parâmetros de cada feature."""
+    return {
+        "max_bins": trial.suggest_int(f"{prefix}max_bins", 3, 10),
+        "min_bin_size": trial.suggest_float(f"{prefix}min_bin_size", 0.01, 0.1),
         "min_event_rate_diff": trial.suggest_float(
-            "min_event_rate_diff", 0.01, 0.1
+            f"{prefix}min_event_rate_diff", 0.01, 0.1
         ),
     }
 
-    # ------------------------------------------------------------------ #
-    # remove possíveis chaves conflitantes antes de repassar
-    cfg = dict(base_kwargs)
-    cfg.pop("min_event_rate_diff", None)
-    cfg.pop("strategy_kwargs", None)
 
-    # cria NASABinner candidato
-    binner = NASABinner(
+def _binner_cfg(base_kwargs: dict[str, Any]) -> dict[str, Any]:
+    """
+    `base_kwargs` sem as chaves que os trials definem (montado uma vez por
+    estudo e só lido pelos trials).
+    """
+    return {
+        k: v for k, v in base_kwargs.items()
+        if k not in ("min_event_rate_diff", "strategy_kwargs", "n_jobs")
+    }
+
+
+def _fit_binner(
+    X: pd.DataFrame,
+    y: pd.Series,
+    params: dict[str, Any],
+    cfg: dict[str, Any],
+    time_col: Optional[str],
+) -> NASABinner:
+    """
+    Treina um NASABinner (sem Optuna) com os parâmetros sugeridos; `cfg` é o
+    resultado de ``_binner_cfg``.
+
+    O fit só usa `time_col` como nome (a safra não é binada nem lida pelo
+    refinamento de uma coluna), então `X` é passado sem a coluna de safra:
+    nenhum DataFrame é montado por trial.
+    """
+    return NASABinner(
         **cfg,
         max_bins=params["max_bins"],
         min_event_rate_diff=params["min_event_rate_diff"],
         strategy_kwargs=dict(min_bin_size=params["min_bin_size"]),
         use_optuna=False,  # evita recursão
-    )
-    df_fit = X.copy()
-    if time_col and time_values is not None:
-        df_fit[time_col] = time_values
+        n_jobs=1,          # uma coluna só: pool de threads seria puro overhead
+    ).fit(X, y, time_col=time_col)
 
-    binner.fit(df_fit, y, time_col=time_col)
 
-    # métricas para avaliação
+def _time_codes(
+    y: pd.Series, time_values: Optional[pd.Series]
+) -> Optional[tuple[np.ndarray, pd.Index, np.ndarray]]:
+    """
+    Safra fatorizada e target como arrays, calculados uma vez por estudo.
+
+    Só os códigos de bin mudam entre trials; fatorizar a safra (ordenando)
+    e converter `y` a cada trial era trabalho repetido. Os arrays são só
+    lidos, então podem ser compartilhados por trials em threads.
+    """
+    if time_values is None:
+        return None
+    t_codes, t_uniques = pd.factorize(time_values, sort=True)
+    return t_codes, t_uniques, np.ascontiguousarray(y.to_numpy(), dtype=np.int64)
+
+
+class _CodesCache:
+    """
+    LRU (thread-safe) de ``(códigos de bin, uniques)`` por cortes ajustados.
+
+    Dentro de um estudo X e y são fixos, então trials cujo OptimalBinning
+    chega aos mesmos cortes produzem o mesmo ``transform``; o TPE revisita
+    bastante as mesmas regiões. Códigos guardados em int8/int16 para que
+    ``maxsize`` entradas caibam na memória mesmo com muitas linhas.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+            return hit
+
+    def put(self, key, codes: np.ndarray, uniques) -> None:
+        codes = codes.astype(np.min_scalar_type(-max(len(uniques), 1)), copy=False)
+        with self._lock:
+            self._data[key] = (codes, uniques)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def _splits_key(binner: NASABinner, col: str) -> Optional[bytes]:
+    """Chave dos cortes do OptimalBinning de `col` (None se não houver)."""
+    strat = binner._per_feature_binners.get(col)
+    if hasattr(strat, "models_"):                       # SupervisedBinning
+        ob = strat.models_.get(col)
+    elif getattr(strat, "_encoder", (None, None))[1] == "woe":   # CategoricalBinning
+        ob = strat._encoder[0]
+    else:
+        return None
+    splits = getattr(ob, "splits", None)
+    return None if splits is None else pickle.dumps((col, splits))
+
+
+def _score_binner(
+    binner: NASABinner,
+    X: pd.DataFrame,
+    y: pd.Series,
+    time_col: Optional[str],
+    time_values: Optional[pd.Series],
+    alpha: float,
+    beta: float,
+    gamma: float,
+    time_codes: Optional[tuple[np.ndarray, pd.Index, np.ndarray]] = None,
+    scoring: Scoring = "temporal",
+    codes_cache: Optional[_CodesCache] = None,
+) -> dict[str, float]:
+    """
+    Métricas de um binner já treinado. `time_codes` é o resultado de
+    ``_time_codes`` (recalculado se omitido); com `codes_cache` o ``transform``
+    é reaproveitado entre trials de mesmos cortes.
+
+    ``scoring="temporal"``: ``α·separabilidade + β·IV + γ·KS``.
+    ``scoring="iv_psi"``: ``IV − 0.5·PSI − 0.01·n_bins`` (PSI entre a primeira
+    e a última safra).
+    """
+    if scoring not in _SCORINGS:
+        raise ValueError(f"scoring deve ser um de {_SCORINGS}, não {scoring!r}")
     iv = binner.iv_
     n_bins = len(binner.bin_summary)
 
     if time_col and time_values is not None:
-        bins = binner.transform(df_fit)[X.columns[0]]
-        df_tmp = pd.DataFrame({
-            'bin': bins,
-            'target': y,
-            'time': time_values,
-        })
-        sep = temporal_separability_score(
-            df_tmp, X.columns[0], 'bin', 'target', 'time'
-        )
-        tbl = (
-            df_tmp.groupby(['bin', 'time'])['target']
-            .agg(['sum','count']).reset_index()
-            .rename(columns={'sum':'event','count':'count'})
+        # eventos/total por (bin, safra) direto dos arrays, sem DataFrame auxiliar
+        from ._kernels import hist2d
+
+        t_codes, t_uniques, y_arr = time_codes or _time_codes(y, time_values)
+        col = X.columns[0]
+        key = _splits_key(binner, col) if codes_cache is not None else None
+        hit = codes_cache.get(key) if key is not None else None
+        if hit is None:
+            b_codes, b_uniques = pd.factorize(binner.transform(X)[col], sort=True)
+            if key is not None:
+                codes_cache.put(key, b_codes, b_uniques)
+        else:
+            b_codes, b_uniques = hit
+        ok = (b_codes >= 0) & (t_codes >= 0)
+        hist = hist2d(
+            b_codes[ok], t_codes[ok], y_arr[ok], len(b_uniques), len(t_uniques)
         )
-        tbl['variable'] = X.columns[0]
-        pivot = event_rate_by_time(tbl, 'time')
-        ks = ks_over_time(pivot)
+        # matriz bin × safra de event-rate; KS/PSI a consomem direto, sem pivot
+        with np.errstate(invalid="ignore", divide="ignore"):
+            curves = np.where(hist[..., 1] > 0, hist[..., 0] / hist[..., 1], np.nan)
+
+        sep = _separability_from_curves(curves)
+        ks = ks_over_time(curves)
+        psi = psi_over_time(curves) if scoring == "iv_psi" else 0.0
     else:
         sep = 0.0
         ks = 0.0
+        psi = 0.0
+
+    if scoring == "iv_psi":
+        score = iv - 0.5 * psi - 0.01 * n_bins
+    else:
+        score = alpha * sep + beta * iv + gamma * ks
+    return {
+        "separability": sep, "iv": iv, "ks": ks, "psi": psi,
+        "n_bins": n_bins, "score": score,
+    }
+
+
+def _new_sampler(n_trials: int) -> optuna.samplers.TPESampler:
+    with warnings.catch_warnings():
+        # multivariate/group ainda são marcados como experimentais no Optuna
+        warnings.simplefilter("ignore", optuna.exceptions.ExperimentalWarning)
+        # constant_liar evita sugestões duplicadas entre workers do mesmo estudo
+        return optuna.samplers.TPESampler(
+            multivariate=True,
+            group=True,
+            constant_liar=True,
+            n_startup_trials=max(5, n_trials // 4),
+        )
 
-    score = alpha * sep + beta * iv + gamma * ks
 
-    trial.set_user_attr('separability', sep)
-    trial.set_user_attr('iv', iv)
-    trial.set_user_attr('ks', ks)
-    trial.set_user_attr('n_bins', n_bins)
-    trial.set_user_attr('score', score)
+# --------------------------------------------------------------------------- #
+def _objective(
+    trial: optuna.Trial,
+    X: pd.DataFrame,
+    y: pd.Series,
+    cfg: dict[str, Any],
+    time_col: Optional[str],
+    time_values: Optional[pd.Series],
+    alpha: float,
+    beta: float,
+    gamma: float,
+    time_codes: Optional[tuple[np.ndarray, pd.Index, np.ndarray]] = None,
+    scoring: Scoring = "temporal",
+    codes_cache: Optional[_CodesCache] = None,
+) -> float:
+    """
+    Função objetivo usada pelo Optuna.
+
+    `cfg` e `time_codes` (``_binner_cfg`` / ``_time_codes``) são pré-computados
+    uma vez por estudo e só lidos aqui; `time_codes` é recalculado se omitido.
+
+    Não há ``trial.report``: uma poda walk-forward exigiria um ajuste do
+    OptimalBinning por safra, mais caro que o ajuste único que pouparia.
+    """
+    params = _suggest_params(trial)
+    binner = _fit_binner(X, y, params, cfg, time_col)
+
+    metrics = _score_binner(
+        binner, X, y, time_col, time_values, alpha, beta, gamma,
+        time_codes=time_codes, scoring=scoring, codes_cache=codes_cache,
+    )
+    del binner                 # libera já; gc_after_trial recolhe o resto
+    for name, value in metrics.items():
+        trial.set_user_attr(name, value)
 
     logger.info(
-        f"Trial {trial.number}: score={score:.4f}, sep={sep:.4f}, iv={iv:.4f}, ks={ks:.4f}"
+        f"Trial {trial.number}: score={metrics['score']:.4f}, "
+        f"sep={metrics['separability']:.4f}, iv={metrics['iv']:.4f}, "
+        f"ks={metrics['ks']:.4f}"
     )
 
-    return score
+    return metrics["score"]
 
 
 # --------------------------------------------------------------------------- #
@@ -128,11 +294,35 @@ def optimize_bins(
     alpha: float = 0.7,
     beta: float = 0.2,
     gamma: float = 0.1,
+    storage: str | optuna.storages.BaseStorage | None = None,
+    study_name: Optional[str] = None,
+    load_if_exists: bool = True,
+    n_jobs: int = 1,
+    gc_after_trial: bool = True,
+    scoring: Scoring = "temporal",
     **base_kwargs,
 ) -> Tuple[dict[str, Any], NASABinner]:
     """
     Executa Optuna para achar hiperparâmetros ideais.
 
+    Sem poda: o objetivo não tem valor intermediário antes do ajuste (ver o
+    docstring do módulo); ``pruner`` só existe em ``optimize_bins_joint``.
+
+    ``scoring`` escolhe a função de score (ver ``_score_binner``): ``"temporal"``
+    (padrão) ou ``"iv_psi"``.
+
+    Com ``storage`` (ex.: ``"sqlite:///nasa.db"``) e ``study_name`` o estudo é
+    persistido e retomado: novas chamadas aproveitam os trials já avaliados
+    como warm start do TPE. ``load_if_exists=False`` exige um estudo novo
+    (``DuplicatedStudyError`` se o nome já existir no ``storage``).
+
+    ``n_jobs`` roda trials em paralelo (threads, via ``study.optimize``) e
+    ``gc_after_trial`` libera os objetos de cada trial. Os arrays de
+    safra/target e a configuração do binner são montados uma vez e só lidos
+    pelos trials (que ajustam direto sobre `X`, sem copiá-lo); para vários
+    processos no mesmo estudo use um ``storage`` compartilhado (RDB como
+    SQLite/PostgreSQL, ou ``JournalStorage``).
+
     Retorna
     -------
     best_params : dict
@@ -140,16 +330,30 @@ def optimize_bins(
     fitted_binner : NASABinner
         Binner treinado com os melhores hiperparâmetros.
     """
-    study = optuna.create_study(direction="maximize")
+    study = optuna.create_study(
+        study_name=study_name,
+        storage=storage,
+        load_if_exists=load_if_exists,
+        direction="maximize",
+        sampler=_new_sampler(n_trials),
+        pruner=optuna.pruners.NopPruner(),
+    )
 
     # ajustando verbose do optuna
     optuna.logging.set_verbosity(optuna.logging.WARNING)
 
+    # uma vez por estudo, fora dos trials (somente leitura → seguro com n_jobs > 1)
+    cfg = _binner_cfg(base_kwargs)
+    time_codes = _time_codes(y, time_values)
+    codes_cache = _CodesCache()
     study.optimize(
         lambda tr: _objective(
-            tr, X, y, base_kwargs, time_col, time_values, alpha, beta, gamma
+            tr, X, y, cfg, time_col, time_values, alpha, beta, gamma,
+            time_codes, scoring, codes_cache,
         ),
         n_trials=n_trials,
+        n_jobs=n_jobs,
+        gc_after_trial=gc_after_trial,
         show_progress_bar=False,
     )
 
@@ -162,23 +366,132 @@ def optimize_bins(
 
     # ------------------------------------------------------------------ #
     # treina binner final com melhores parâmetros
-    cfg = dict(base_kwargs)
-    cfg.pop("min_event_rate_diff", None)
-    cfg.pop("strategy_kwargs", None)
-
-    df_final = X.copy()
-    if time_col and time_values is not None:
-        df_final[time_col] = time_values
-
-    final_binner = NASABinner(
-        **cfg,
-        max_bins=best_params["max_bins"],
-        min_event_rate_diff=best_params["min_event_rate_diff"],
-        strategy_kwargs=dict(min_bin_size=best_params["min_bin_size"]),
-        use_optuna=False,
-    ).fit(df_final, y, time_col=time_col)
+    final_binner = _fit_binner(X, y, best_params, cfg, time_col)
 
     # expõe best_params ao objeto para debug externo se desejado
     final_binner.best_params_ = best_params
 
     return best_params, final_binner
+
+
+# --------------------------------------------------------------------------- #
+def optimize_bins_joint(
+    X: pd.DataFrame,
+    y: pd.Series,
+    *,
+    cols: Optional[list[str]] = None,
+    time_col: str | None = None,
+    time_values: Optional[pd.Series] = None,
+    n_trials: int = 20,
+    alpha: float = 0.7,
+    beta: float = 0.2,
+    gamma: float = 0.1,
+    pruner: Optional[optuna.pruners.BasePruner] = None,
+    storage: str | optuna.storages.BaseStorage | None = None,
+    study_name: Optional[str] = None,
+    load_if_exists: bool = True,
+    n_jobs: int = 1,
+    gc_after_trial: bool = True,
+    scoring: Scoring = "temporal",
+    **base_kwargs,
+) -> Tuple[dict[str, dict[str, Any]], dict[str, NASABinner]]:
+    """
+    Otimiza todas as features `cols` num único estudo.
+
+    Cada trial sugere ``{col}__max_bins`` etc. para todas as features e as
+    ajusta em sequência; o valor do trial é a soma dos scores por feature
+    (mesma fórmula de ``optimize_bins``). A soma parcial é reportada após cada
+    coluna, de modo que o pruner (padrão ``SuccessiveHalvingPruner``) descarta
+    trials ruins sem ajustar o restante do schema.
+
+    Como o objetivo é separável, cada feature fica com os parâmetros do trial
+    (completo ou podado) em que ela teve o maior score individual. Combinações
+    de parâmetros repetidas reaproveitam o ajuste já feito.
+
+    Retorna
+    -------
+    best_params : dict
+        {col: {'max_bins', 'min_bin_size', 'min_event_rate_diff'}}
+    fitted_binners : dict
+        {col: NASABinner} treinados com os melhores hiperparâmetros.
+    """
+    cols = list(X.columns if cols is None else cols)
+    if pruner is None:
+        pruner = optuna.pruners.SuccessiveHalvingPruner(
+            min_resource=1, reduction_factor=3
+        )
+
+    # (col, params) → score, e o melhor (score, params, binner) de cada coluna
+    seen: dict[tuple, float] = {}
+    best: dict[str, tuple[float, dict[str, Any], Optional[NASABinner]]] = {}
+    lock = threading.Lock()    # trials concorrentes quando n_jobs > 1
+    cfg = _binner_cfg(base_kwargs)
+    time_codes = _time_codes(y, time_values)
+    frames = {col: X[[col]] for col in cols}
+    codes_cache = _CodesCache()        # chave inclui a coluna
+
+    def objective(trial: optuna.Trial) -> float:
+        running = 0.0
+        for step, col in enumerate(cols):
+            params = _suggest_params(trial, prefix=f"{col}__")
+            key = (col, tuple(sorted(params.items())))
+            score = seen.get(key)
+            if score is None:
+                binner = _fit_binner(frames[col], y, params, cfg, time_col)
+                score = _score_binner(
+                    binner, frames[col], y, time_col, time_values, alpha, beta, gamma,
+                    time_codes=time_codes, scoring=scoring, codes_cache=codes_cache,
+                )["score"]
+                with lock:
+                    seen[key] = score
+                    if col not in best or score > best[col][0]:
+                        best[col] = (score, params, binner)
+            trial.set_user_attr(f"{col}__score", score)
+
+            running += score
+            trial.report(running, step)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+        return running
+
+    study = optuna.create_study(
+        study_name=study_name,
+        storage=storage,
+        load_if_exists=load_if_exists,
+        direction="maximize",
+        sampler=_new_sampler(n_trials),
+        pruner=pruner,
+    )
+
+    # trials de execuções anteriores (storage) também concorrem por coluna
+    for tr in study.trials:
+        for col in cols:
+            score = tr.user_attrs.get(f"{col}__score")
+            if score is not None and (col not in best or score > best[col][0]):
+                params = {
+                    k: tr.params[f"{col}__{k}"]
+                    for k in ("max_bins", "min_bin_size", "min_event_rate_diff")
+                }
+                best[col] = (score, params, None)
+
+    # ajustando verbose do optuna
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study.optimize(
+        objective,
+        n_trials=n_trials,
+        n_jobs=n_jobs,
+        gc_after_trial=gc_after_trial,
+        show_progress_bar=False,
+    )
+
+    best_params: dict[str, dict[str, Any]] = {}
+    binners: dict[str, NASABinner] = {}
+    for col in cols:
+        _, params, binner = best[col]
+        if binner is None:
+            binner = _fit_binner(frames[col], y, params, cfg, time_col)
+        binner.best_params_ = params
+        best_params[col] = params
+        binners[col] = binner
+
+    return best_params, binners
@@ -5,13 +5,18 @@ Pós-processamento dos cortes:
 2. Garante diferença mínima de event rate (Δ ER) entre bins vizinhos.
 3. Mantém monotonicidade asc/desc se solicitado.
 4. (opcional) armazena PSI de 1.ª × última safra.
+5. Armazena o IV das faixas regulares em ``attrs["iv"]``.
 """
 
 from __future__ import annotations
+import copy
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 import re
 
+from .metrics import iv
+
 _INTERVAL_RE = re.compile(r"""
     ^\s*
     (?P<lb>[\(\[]) \s*
@@ -20,6 +25,54 @@ _INTERVAL_RE = re.compile(r"""
     \s* (?P<rb>[\)\]]) \s*
 $""", re.VERBOSE)
 
+def regular_bins_mask(tbl: pd.DataFrame) -> np.ndarray:
+    """Máscara das faixas regulares (sem Special/Missing/Totals e bins vazios)."""
+    bins = tbl["bin"]
+    return (
+        (tbl["count"].to_numpy() > 0)
+        & ~bins.astype(str).str.lower().isin(["total", "special", "missing"]).to_numpy()
+        & (bins != tbl["variable"]).to_numpy()        # remove total-geral
+        & (bins != "").to_numpy()
+    )
+
+
+# grafias aceitas de cada coluna normalizada, em ordem de precedência
+# (a do OptimalBinning primeiro); None no plano = calcular a coluna
+_COLUMN_ALIASES = {
+    "bin": ("Bin", "bin"),
+    "count": ("Count", "count"),
+    "event": ("Event", "event"),
+}
+
+
+@lru_cache(maxsize=32)
+def _column_plan(cols: tuple) -> tuple[tuple[str, str | None], ...]:
+    """
+    Resolve uma única vez por esquema de colunas de onde vem cada coluna
+    normalizada: ``((destino, origem | None), ...)`` na ordem final. O esquema
+    do OptimalBinning é fixo, então nos trials isto é só uma consulta ao cache.
+    """
+    if "variable" not in cols:
+        raise KeyError("nenhuma coluna 'variable' encontrada em bin_tbl")
+    plan = [("variable", "variable")]
+
+    for key, names in _COLUMN_ALIASES.items():
+        src = next((n for n in names if n in cols), None)
+        if src is None:
+            raise KeyError(f"nenhuma coluna '{names[0]}' ou '{key}' encontrada em bin_tbl")
+        plan.append((key, src))
+
+    non_cols = [
+        c for c in cols
+        if c.lower().replace("-", " ").strip() in {"non event", "nonevent"}
+    ]
+    plan.append(("non_event", non_cols[0] if non_cols else None))
+    plan.append(
+        ("event_rate", next((n for n in ("Event Rate", "event_rate") if n in cols), None))
+    )
+    return tuple(plan)
+
+
 def _check_monotonic(series: pd.Series, trend: str) -> bool:
     if trend == "ascending":
         return series.is_monotonic_increasing
@@ -53,79 +106,39 @@ def refine_bins(
       "Event Rate" ou "event_rate",
       além de "variable" e possivelmente time_col.
     """
-    # 1) Copiar e resetar índice
-    tbl = bin_tbl.copy().reset_index(drop=True)
-
-    # 2) Normalizar nomes de coluna
-
-    # variable (presume existir)
-    if "variable" not in tbl.columns:
-        raise KeyError("nenhuma coluna 'variable' encontrada em bin_tbl")
-
-    # bin
-    if "Bin" in tbl.columns:
-        tbl["bin"] = tbl["Bin"]
-    elif "bin" not in tbl.columns:
-        raise KeyError("nenhuma coluna 'Bin' ou 'bin' encontrada em bin_tbl")
-
-    # count
-    if "Count" in tbl.columns:
-        tbl["count"] = tbl["Count"]
-    elif "count" not in tbl.columns:
-        raise KeyError("nenhuma coluna 'Count' ou 'count' encontrada em bin_tbl")
-
-    # event
-    if "Event" in tbl.columns:
-        tbl["event"] = tbl["Event"]
-    elif "event" not in tbl.columns:
-        raise KeyError("nenhuma coluna 'Event' ou 'event' encontrada em bin_tbl")
-
-    # non_event
-    non_cols = [
-        c for c in tbl.columns
-        if c.lower().replace("-", " ").strip() in {"non event", "nonevent"}
-    ]
-    if non_cols:
-        tbl["non_event"] = tbl[non_cols[0]]
-    else:
+    # 1) Normalizar nomes de coluna montando a tabela só com as colunas
+    #    usadas (sem copiar bin_tbl inteiro); `.array` + dict → RangeIndex
+    #    e cópia própria, então as fusões abaixo não tocam a entrada.
+    cols = bin_tbl.columns
+    data = {
+        key: None if src is None else bin_tbl[src].array
+        for key, src in _column_plan(tuple(cols))
+    }
+    if data["non_event"] is None:
         # Calcula se não existir explicitamente
-        tbl["non_event"] = tbl["count"] - tbl["event"]
-
-    # event_rate
-    if "Event Rate" in tbl.columns:
-        tbl["event_rate"] = tbl["Event Rate"]
-    elif "event_rate" not in tbl.columns:
+        data["non_event"] = data["count"] - data["event"]
+    if data["event_rate"] is None:
         # Se não estiver, calcula a partir de event/count
-        tbl["event_rate"] = tbl["event"] / tbl["count"]
+        data["event_rate"] = data["event"] / data["count"]
 
-    # 3) Selecionar apenas colunas existentes
-    base_cols = ["variable", "bin", "count", "event", "non_event", "event_rate"]
-    if time_col and time_col in tbl.columns:
-        base_cols.append(time_col)
+    # 2) time_col, se existir
+    if time_col and time_col in cols:
+        data[time_col] = bin_tbl[time_col].array
 
-    tbl = tbl[base_cols]
+    # 3) Tabela normalizada (attrs da entrada preservados, como no .copy())
+    tbl = pd.DataFrame(data)
+    tbl.attrs = copy.deepcopy(bin_tbl.attrs)
 
     # -------------------------------------------------- #
-    # 4) Fusão por Δ event rate
-    i = 0
-    while i < len(tbl) - 1:
-        delta = abs(tbl.at[i, "event_rate"] - tbl.at[i + 1, "event_rate"])
-        if delta < min_er_delta:
-            tbl = _merge(tbl, i, i + 1)
-        else:
-            i += 1
+    # 4) Fusão por Δ event rate (com Δ <= 0 nenhum par se funde: pula a varredura)
+    if min_er_delta > 0 and len(tbl) > 1:
+        tbl = _merge_by_delta(tbl, min_er_delta)
 
     # -------------------------------------------------- #
-    # 5) Monotonicidade global (se houver)
-    if trend is not None and not _check_monotonic(tbl["event_rate"], trend):
-        # fusão iterativa do par que menos viola monotonicidade
-        while not _check_monotonic(tbl["event_rate"], trend) and len(tbl) > 2:
-            diff = tbl["event_rate"].diff().fillna(0)
-            bad = diff[diff * (1 if trend == "ascending" else -1) < 0].index
-            if len(bad) == 0:
-                break
-            idx = bad[0] - 1
-            tbl = _merge(tbl, idx, idx + 1)
+    # 5) Monotonicidade global (se houver): funde pares que violam a tendência
+    if (trend is not None and not _check_monotonic(tbl["event_rate"], trend)
+            and len(tbl) > 2):
+        tbl = _merge_monotonic(tbl, trend)
 
     # -------------------------------------------------- #
     # 6) PSI ao longo do tempo (opcional)
@@ -134,19 +147,22 @@ def refine_bins(
         pivot = event_rate_by_time(tbl, time_col)
         tbl.attrs["psi_over_time"] = psi_over_time(pivot)
 
+    # -------------------------------------------------- #
+    # 7) IV já com as fusões aplicadas (evita nova passada no NASABinner)
+    regular = tbl[regular_bins_mask(tbl)]
+    tbl.attrs["iv"] = iv(regular) if len(regular) else 0.0
+
     return tbl
 
 
-def _merge(df: pd.DataFrame, i: int, j: int) -> pd.DataFrame:
-    """Fundir linhas i e j; ajustar rótulo se forem intervalos contíguos."""
-    # somar contagens
-    cols = ["count", "non_event", "event"]
-    df.loc[i, cols] = df.loc[[i, j], cols].sum()
-    df.loc[i, "event_rate"] = df.loc[i, "event"] / df.loc[i, "count"]
+_MERGE_COLS = ["count", "event", "non_event", "event_rate"]
 
+
+def _merge_labels(label_i, label_j):
+    """Rótulo do bin fundido; só muda se ambos forem intervalos."""
     # tentar reconhecer ambos os rótulos como intervalos
-    m_i = _INTERVAL_RE.match(str(df.at[i, "bin"]))
-    m_j = _INTERVAL_RE.match(str(df.at[j, "bin"]))
+    m_i = _INTERVAL_RE.match(str(label_i))
+    m_j = _INTERVAL_RE.match(str(label_j))
 
     if m_i and m_j:
         # extremos a preservar
@@ -154,10 +170,58 @@ def _merge(df: pd.DataFrame, i: int, j: int) -> pd.DataFrame:
         new_right = m_j.group("right")
         lb = m_i.group("lb")         # parêntese ou colchete esquerdo
         rb = m_j.group("rb")         # direito
-        df.at[i, "bin"] = f"{lb}{new_left}, {new_right}{rb}"
+        return f"{lb}{new_left}, {new_right}{rb}"
+    return label_i
+
+
+def _merge_by_delta(tbl: pd.DataFrame, min_delta: float) -> pd.DataFrame:
+    """
+    Fusões por Δ event-rate numa única passada (``_kernels.merge_by_delta``)
+    e a tabela reconstruída uma vez, em vez de a cada par fundido.
+    """
+    from ._kernels import merge_by_delta
 
-    # remover linha j e reindexar
-    return df.drop(index=j).reset_index(drop=True)
+    *merged, start = merge_by_delta(*(tbl[c].to_numpy() for c in _MERGE_COLS), min_delta)
+    if len(start) == len(tbl):
+        return tbl
+    # cada grupo absorve suas linhas da esquerda para a direita
+    stop = np.append(start[1:], len(tbl))
+    left = np.repeat(start, stop - start - 1)
+    right = np.concatenate([np.arange(a + 1, b) for a, b in zip(start, stop)])
+    return _rebuild_merged(tbl, merged, start, left, right)
+
+
+def _merge_monotonic(tbl: pd.DataFrame, trend: str) -> pd.DataFrame:
+    """
+    Fusões até a monotonicidade numa única passada (``_kernels.merge_monotonic``,
+    pool-adjacent-violators) em vez de refazer a tabela a cada par violador.
+    """
+    from ._kernels import merge_monotonic
+
+    *merged, start, left, right = merge_monotonic(
+        *(tbl[c].to_numpy() for c in _MERGE_COLS), trend
+    )
+    if len(start) == len(tbl):
+        return tbl
+    return _rebuild_merged(tbl, merged, start, left, right)
+
+
+def _rebuild_merged(tbl, merged, start, left, right) -> pd.DataFrame:
+    """
+    Monta a tabela fundida de uma vez: contagens/taxa dos kernels, demais
+    colunas (variable, safra) da 1ª linha de cada grupo e rótulos refeitos
+    repetindo as fusões ``left[m] ← right[m]`` na ordem em que ocorreram
+    (intervalos contíguos viram um só; outros rótulos ficam com o da esquerda).
+    """
+    out = tbl.iloc[start].reset_index(drop=True)
+    for c, values in zip(_MERGE_COLS, merged):
+        out[c] = values.astype(tbl[c].dtype, copy=False)
+
+    labels = dict(enumerate(tbl["bin"].to_numpy()))
+    for i, j in zip(left.tolist(), right.tolist()):
+        labels[i] = _merge_labels(labels[i], labels[j])
+    out["bin"] = [labels[i] for i in start.tolist()]
+    return out
 
 
 
@@ -3,10 +3,14 @@ Geração de relatórios auditáveis (.xlsx / .json) de binagem ou comparação.
 """
 
 from __future__ import annotations
+import json
+import math
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import Union
 from .binning_engine import NASABinner
+from .utils.excel import excel_writer, write_frame
 
 PathLike = Union[str, Path]
 
@@ -24,29 +28,68 @@ def save_binner_report(binner: NASABinner, path: PathLike) -> None:
 
 
 def _save_excel(binner: NASABinner, path: Path) -> None:
-    with pd.ExcelWriter(path) as writer:
-        binner._bin_summary_.to_excel(writer, sheet_name="bin_table", index=False)
+    # XlsxWriter em constant_memory (se instalado): linhas vão para o disco
+    # conforme são escritas, em vez de o workbook inteiro ficar na memória
+    bs = binner.bin_summary
+    with excel_writer(path) as writer:
+        write_frame(writer, bs, "bin_table", index=False)
         meta = pd.DataFrame(
             {
                 "metric": ["IV", "n_bins", "PSI_over_time"],
                 "value": [
                     binner.iv_,
-                    len(binner._bin_summary_),
-                    binner._bin_summary_.attrs.get("psi_over_time"),
+                    len(bs),
+                    bs.attrs.get("psi_over_time"),
                 ],
             }
         )
-        meta.to_excel(writer, sheet_name="metrics", index=False)
+        write_frame(writer, meta, "metrics", index=False)
 
         if hasattr(binner, "_pivot_"):
-            binner._pivot_.to_excel(writer, sheet_name="pivot_event_rate")
+            write_frame(writer, binner._pivot_, "pivot_event_rate")
 
 # ------------------------------------------------------------------ #
+def _finite_or_none(obj):
+    """NaN/±inf → None (recursivo): ``null`` no JSON com orjson ou com json."""
+    if isinstance(obj, (float, np.floating)):
+        return float(obj) if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite_or_none(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite_or_none(v) for v in obj]
+    return obj
+
+
+def _json_default(obj):
+    """Tipos que nem orjson nem json serializam sozinhos."""
+    if hasattr(obj, "tolist"):          # escalares e arrays NumPy
+        return _finite_or_none(obj.tolist())
+    return str(obj)                     # ex.: pd.Interval, Timestamp
+
+
+def _dumps(info: dict) -> bytes:
+    """JSON indentado; usa orjson (opcional, bem mais rápido) se instalado."""
+    # NaN viraria null no orjson mas NaN (JSON inválido) no json: normaliza antes
+    info = _finite_or_none(info)
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(
+            info, indent=2, default=_json_default, allow_nan=False,
+        ).encode()
+    return orjson.dumps(
+        info,
+        default=_json_default,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
 def _save_json(binner: NASABinner, path: Path) -> None:
+    bs = binner.bin_summary
     info = {
         "iv": binner.iv_,
-        "n_bins": len(binner._bin_summary_),
-        "psi_over_time": binner._bin_summary_.attrs.get("psi_over_time"),
-        "bin_table": binner._bin_summary_.to_dict(orient="records"),
+        "n_bins": len(bs),
+        "psi_over_time": bs.attrs.get("psi_over_time"),
+        "bin_table": bs.to_dict(orient="records"),
     }
-    path.write_text(pd.json.dumps(info, indent=2))
+    path.write_bytes(_dumps(info))
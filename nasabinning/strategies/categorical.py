@@ -1,14 +1,61 @@
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 from optbinning import OptimalBinning
 from category_encoders.ordinal import OrdinalEncoder
 
+_RARE = "_RARE_"
+
+
+def _merge_rare(s: pd.Series, threshold: float) -> pd.Series:
+    """
+    Junta em ``"_RARE_"`` as categorias com frequência relativa < `threshold`.
+
+    Trabalha só sobre os códigos do Categorical: uma ``bincount`` conta as
+    categorias e uma tabela código antigo → novo remapeia tudo de uma vez
+    (no lugar de value_counts + ``Series.replace``). Mesmo resultado do
+    ``replace`` — inclusive a ordem das categorias: ``"_RARE_"`` ocupa o
+    lugar da primeira categoria rara (ou mantém o seu, se já existir).
+    """
+    cats = s.cat.categories
+    codes = s.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(cats))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rare = counts / counts.sum() < threshold
+    if not rare.any():
+        return s
+
+    keep = ~rare
+    existing = np.flatnonzero(keep & (cats == _RARE))
+    target = existing[0] if existing.size else np.argmax(rare)
+    keep[target] = True
+    new_code = np.cumsum(keep) - 1            # posição de cada categoria mantida
+    new_code[rare] = new_code[target]
+    new_cats = cats[keep].astype(object).to_numpy()
+    new_cats[new_code[target]] = _RARE
+    merged = pd.Categorical.from_codes(
+        np.where(codes >= 0, new_code[codes], -1),
+        categories=new_cats,
+        ordered=s.cat.ordered,
+    )
+    return pd.Series(merged, index=s.index, name=s.name)
+
+
+def _bin_lookup(ob, dtype: pd.CategoricalDtype) -> np.ndarray:
+    """Rótulo do bin de cada categoria de `dtype` (tabela código → bin)."""
+    cats = np.asarray(dtype.categories.to_numpy(), dtype=object)
+    return np.asarray(ob.transform(cats, metric="bins"), dtype=object)
+
 
 class CategoricalBinning:
     """
     Rare-merge + OptimalBinning(dtype='categorical').
 
     Se o solver falhar (ou resultar <2 bins), recorre a encoder ordinal.
+    ``solver``/``time_limit`` e o pré-binning (``prebinning_method``,
+    ``max_n_prebins``, ``min_prebin_size``) são repassados ao OptimalBinning.
+    ``status_`` guarda o status do solver ("FEASIBLE" se o ``time_limit`` se
+    esgotou antes da otimalidade); ``None`` quando caiu no fallback ordinal.
     """
 
     def __init__(
@@ -16,11 +63,24 @@ class CategoricalBinning:
         rare_threshold: float = 0.01,
         max_bins: int = 6,
         min_bin_size: float = 0.05,   # repassado ao OptimalBinning
+        solver: str = "cp",
+        time_limit: int = 30,
+        prebinning_method: str = "cart",
+        max_n_prebins: int = 20,
+        min_prebin_size: float = 0.05,
     ):
         self.rare_threshold = rare_threshold
         self.max_bins = max_bins
         self.min_bin_size = min_bin_size
+        self.solver = solver
+        self.time_limit = time_limit
+        self.prebinning_method = prebinning_method
+        self.max_n_prebins = max_n_prebins
+        self.min_prebin_size = min_prebin_size
         self._encoder = None          # (obj, "woe"|"ordinal")
+        self._fit_dtype = None        # CategoricalDtype pós rare-merge
+        self._code_to_bin = None      # código da categoria → rótulo do bin
+        self.status_ = None
         self.bin_summary_ = None
 
     # ------------------------------------------------------------------
@@ -30,18 +90,19 @@ class CategoricalBinning:
         s = X[col].astype("category")
 
         # ---------- Rare-merge ----------------------------------------
-        freq = s.value_counts(normalize=True)
-        rare = freq[freq < self.rare_threshold].index
-        s = s.replace(rare, "_RARE_").astype("category")
+        s = _merge_rare(s, self.rare_threshold)
 
         # ---------- Tenta OptimalBinning ------------------------------
         ob = OptimalBinning(
             name=col,
             dtype="categorical",
-            solver="cp",
+            solver=self.solver,
+            time_limit=self.time_limit,
+            prebinning_method=self.prebinning_method,
+            max_n_prebins=self.max_n_prebins,
+            min_prebin_size=self.min_prebin_size,
             max_n_bins=self.max_bins,
             min_bin_size=self.min_bin_size,
-            prebin_cat=True,
         )
 
         try:
@@ -50,14 +111,19 @@ class CategoricalBinning:
             if len(pd.unique(codes)) < 2:
                 raise ValueError("Resultou em menos de 2 bins")
             self._encoder = (ob, "woe")
+            self.status_ = ob.status
+            self._fit_dtype = s.dtype
+            self._code_to_bin = _bin_lookup(ob, s.dtype)
         except Exception:
             # ---------- Fallback ordinal ------------------------------
             enc = OrdinalEncoder(cols=[col], handle_unknown="value", handle_missing="value")
             codes = enc.fit_transform(s)[col]
             self._encoder = (enc, "ordinal")
+            self.status_ = None
 
         # ---------- bin_summary_ --------------------------------------
-        df = pd.DataFrame({col: codes, "target": y})
+        # arrays posicionais (como no ob.fit acima): sem alinhar índices de X e y
+        df = pd.DataFrame({col: np.asarray(codes), "target": y.to_numpy()})
         summary = (
             df.groupby(col)["target"]
               .agg(["count", "sum"])
@@ -75,9 +141,15 @@ class CategoricalBinning:
     def transform(self, X: pd.DataFrame) -> pd.DataFrame:
         col = X.columns[0]
         if self._encoder[1] == "woe":
-            codes = self._encoder[0].transform(
-                X[col].astype("category").to_numpy(), metric="bins"
-            )
+            # categorias de treino → gather inteiro na tabela código → bin;
+            # só valores fora dela (nulos, raros e nunca vistos) passam pelo
+            # OptimalBinning.transform
+            x = X[col].to_numpy()
+            cat_codes = pd.Categorical(x, dtype=self._fit_dtype).codes
+            codes = self._code_to_bin.take(cat_codes)
+            other = cat_codes < 0
+            if other.any():
+                codes[other] = self._encoder[0].transform(x[other], metric="bins")
             return pd.DataFrame({col: codes})
         else:
             return self._encoder[0].transform(X[[col]])
\ No newline at end of file
@@ -1,34 +1,112 @@
 """
 Wrapper de OptimalBinning — apenas binagem supervisionada.
 """
+from contextlib import nullcontext
+
+from joblib import Parallel, delayed
 from optbinning import OptimalBinning
+import numpy as np
 import pandas as pd
 
 
+def _fit_one(col, x, y, max_bins, min_bin_size, monotonic_trend, ob_kwargs):
+    """Ajusta o OptimalBinning de uma coluna → (modelo, binning table)."""
+    ob = OptimalBinning(
+        name=col,
+        **ob_kwargs,
+        monotonic_trend=monotonic_trend,
+        max_n_bins=max_bins,
+        min_bin_size=min_bin_size,
+    )
+    ob.fit(x, y)
+    tbl = ob.binning_table.build()
+    tbl["variable"] = col
+    return ob, tbl
+
+
+def _transform_into(out, j, ob, x, return_woe):
+    """Escreve em ``out[:, j]`` a transformação da coluna `x` (in-place)."""
+    if return_woe:
+        out[:, j] = ob.transform(x, metric="woe")
+    else:
+        out[:, j] = ob.transform(x)
+
+
 class SupervisedBinning:
-    """Aplica OptimalBinning em **cada** coluna numérica do DataFrame."""
+    """
+    Aplica OptimalBinning em **cada** coluna numérica do DataFrame.
 
-    def __init__(self, max_bins: int = 10, min_bin_size: float = 0.05):
+    ``solver`` ("cp", "mip" ou "ls") e ``time_limit`` (segundos por coluna) são
+    repassados ao OptimalBinning; "ls" requer o pacote comercial LocalSolver.
+    Esgotado o ``time_limit`` o solver devolve a melhor solução viável já
+    encontrada; ``status_`` guarda, por coluna, o status do solver
+    ("OPTIMAL", "FEASIBLE", ...) para identificar esses casos.
+    O pré-binning (``prebinning_method``, ``max_n_prebins``, ``min_prebin_size``)
+    define o tamanho do problema do solver: cada pré-bin é uma variável.
+    Com ``downcast=True`` o ``transform`` devolve float32 (metade dos bytes);
+    por padrão segue float64. Com ``n_jobs != 1`` os pools de BLAS/OpenMP
+    ficam limitados a ``inner_threads`` por processo durante o ``fit`` (o
+    CP-SAT já roda com um worker no optbinning), evitando n_jobs × núcleos
+    threads disputando a CPU.
+    """
+
+    def __init__(
+        self,
+        max_bins: int = 10,
+        min_bin_size: float = 0.05,
+        n_jobs: int = 1,
+        solver: str = "cp",
+        time_limit: int = 30,
+        prebinning_method: str = "cart",
+        max_n_prebins: int = 20,
+        min_prebin_size: float = 0.05,
+        downcast: bool = False,
+        inner_threads: int = 1,
+    ):
         self.max_bins = max_bins
         self.min_bin_size = min_bin_size
+        self.n_jobs = n_jobs       # colunas ajustadas em paralelo (threads)
+        self.solver = solver
+        self.time_limit = time_limit
+        self.prebinning_method = prebinning_method
+        self.max_n_prebins = max_n_prebins
+        self.min_prebin_size = min_prebin_size
+        self.downcast = downcast
+        self.inner_threads = inner_threads
         self.models_ = {}          # col -> OptimalBinning
+        self.status_ = {}          # col -> status do solver
         self.bin_summary_ = None
 
     # -------------------------------------------------------------- #
     def fit(self, X: pd.DataFrame, y, monotonic_trend=None):
-        summaries = []
-        for col in X.columns:
-            ob = OptimalBinning(
-                name=col,
-                solver="cp",
-                monotonic_trend=monotonic_trend,
-                max_n_bins=self.max_bins,
-                min_bin_size=self.min_bin_size,
+        # colunas independentes; threads → sem pickling de X, e o solver
+        # CP-SAT (C++) libera o GIL durante o ajuste
+        y_arr = y.values
+        ob_kwargs = dict(
+            solver=self.solver,
+            time_limit=self.time_limit,
+            prebinning_method=self.prebinning_method,
+            max_n_prebins=self.max_n_prebins,
+            min_prebin_size=self.min_prebin_size,
+        )
+        tasks = (
+            delayed(_fit_one)(
+                col, X[col].values, y_arr,
+                self.max_bins, self.min_bin_size, monotonic_trend, ob_kwargs,
             )
-            ob.fit(X[col].values, y.values)
+            for col in X.columns
+        )
+        limits = nullcontext()
+        if self.n_jobs != 1:
+            from threadpoolctl import threadpool_limits
+            limits = threadpool_limits(limits=self.inner_threads)
+        with limits:
+            results = Parallel(n_jobs=self.n_jobs, prefer="threads")(tasks)
+
+        summaries = []
+        for col, (ob, tbl) in zip(X.columns, results):
             self.models_[col] = ob
-            tbl = ob.binning_table.build()
-            tbl["variable"] = col
+            self.status_[col] = ob.status
             summaries.append(tbl)
 
         self.bin_summary_ = pd.concat(summaries, ignore_index=True)
@@ -36,11 +114,17 @@ class SupervisedBinning:
 
     # -------------------------------------------------------------- #
     def transform(self, X: pd.DataFrame, return_woe=False):
-        dfs = []
-        for col, ob in self.models_.items():
-            if return_woe:
-                tr = ob.transform(X[col].values, metric="woe")
-            else:
-                tr = ob.transform(X[col].values)
-            dfs.append(pd.DataFrame({col: tr}, index=X.index))
-        return pd.concat(dfs, axis=1)
+        # matriz pré-alocada em ordem Fortran (cada coluna contígua): o
+        # DataFrame embrulha o bloco sem cópia, no lugar de consolidar um
+        # dict de arrays. O metric padrão do OptimalBinning já é "woe".
+        # Colunas em threads (n_jobs), cada uma escrevendo a sua fatia.
+        cols = list(self.models_)
+        dtype = np.float32 if self.downcast else np.float64
+        out = np.empty((len(X), len(cols)), dtype=dtype, order="F")
+        Parallel(n_jobs=self.n_jobs, prefer="threads")(
+            delayed(_transform_into)(
+                out, j, self.models_[col], X[col].to_numpy(copy=False), return_woe,
+            )
+            for j, col in enumerate(cols)
+        )
+        return pd.DataFrame(out, index=X.index, columns=cols, copy=False)
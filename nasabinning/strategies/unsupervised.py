@@ -6,35 +6,69 @@ Binagem não supervisionada para qualquer número de colunas com
 KBinsDiscretizer (uniform, quantile, k-means).
 """
 
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import KBinsDiscretizer
 
 
+def _fit_kbd(X: pd.DataFrame, method: str, n_bins: int) -> KBinsDiscretizer:
+    """KBinsDiscretizer ajustado; função pura → memoizável pelo joblib."""
+    return KBinsDiscretizer(n_bins=n_bins, encode="ordinal", strategy=method).fit(X)
+
+
 class UnsupervisedBinning:
     def __init__(
         self,
         method: str = "quantile",    # "uniform" | "quantile" | "kmeans"
         n_bins: int = 10,
+        cache_dir: str | None = None,
+        downcast: bool = False,
     ):
         if method not in {"uniform", "quantile", "kmeans"}:
             raise ValueError("method must be uniform, quantile or kmeans")
         self.method = method
         self.n_bins = n_bins
+        self.cache_dir = cache_dir   # joblib.Memory dos cortes por (X, method, n_bins)
+        self.downcast = downcast     # códigos int16/int32 no lugar de float
         self._kbd = None
+        self._edges = None         # cortes internos de cada coluna
 
     # -------------------------------------------------------------- #
     def fit(self, X: pd.DataFrame, y=None, **kwargs):
-        self._kbd = KBinsDiscretizer(
-            n_bins=self.n_bins,
-            encode="ordinal",
-            strategy=self.method,
-        )
-        self._kbd.fit(X)
+        fit_kbd = _fit_kbd
+        if self.cache_dir is not None:
+            # buscas de hiperparâmetros/CV refazem o fit no mesmo X: os cortes
+            # saem do disco (chave = hash completo dos dados + parâmetros)
+            from joblib import Memory
+            fit_kbd = Memory(self.cache_dir, verbose=0).cache(_fit_kbd)
+        self._kbd = fit_kbd(X, self.method, self.n_bins)
+        # os cortes (regras de quantil/largura mínima) vêm do sklearn; o
+        # transform só precisa dos internos, já prontos para o kernel
+        self._edges = [e[1:-1] for e in self._kbd.bin_edges_]
         return self
 
     # -------------------------------------------------------------- #
     def transform(self, X: pd.DataFrame, return_woe=False):
         if return_woe:
             raise NotImplementedError("WoE requer target supervisionado.")
-        Xt = self._kbd.transform(X)
+        from .._kernels import digitize_columns
+
+        # mesma regra do KBinsDiscretizer.transform (searchsorted "right" nos
+        # cortes internos), num único kernel sobre todas as colunas
+        values = X.to_numpy()
+        if values.dtype not in (np.float32, np.float64):
+            values = values.astype(np.float64)
+        if values.shape[1] != len(self._edges):
+            raise ValueError(
+                f"X tem {values.shape[1]} colunas, mas o binner foi ajustado "
+                f"com {len(self._edges)}"
+            )
+        if not np.isfinite(values).all():
+            raise ValueError("X contém NaN ou infinito")
+        # downcast: menor inteiro que cobre n_bins (opt-in; o padrão segue
+        # float como o KBinsDiscretizer)
+        dtype = None
+        if self.downcast:
+            dtype = np.int16 if self.n_bins < 32768 else np.int32
+        Xt = digitize_columns(values, self._edges, dtype=dtype)
         return pd.DataFrame(Xt, columns=X.columns, index=X.index)
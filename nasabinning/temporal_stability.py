@@ -11,11 +11,12 @@ psi_over_time(df_pivot)              -> PSI entre 1ª e última safra
 ks_over_time(df_pivot)               -> KS entre 1ª e última safra
 temporal_separability_score(df, variable, bin_col, target_col, time_col)
     -> escore médio de separação temporal
+build_time_bin_panel(df, bin_cols, target_col, time_col)
+    -> eventos/contagens por (bin, safra) de várias colunas, para reuso
 """
 
 import pandas as pd
 import numpy as np
-from scipy.stats import ks_2samp
 
 # ------------------------------------------------------------------ #
 def event_rate_by_time(bin_tbl: pd.DataFrame, time_col: str) -> pd.DataFrame:
@@ -24,18 +25,38 @@ def event_rate_by_time(bin_tbl: pd.DataFrame, time_col: str) -> pd.DataFrame:
     Retorna DataFrame pivotado: index = (variable, bin), columns = safra,
     values = event_rate.
     """
-    df = bin_tbl.copy()
-    df["event_rate"] = df["event"] / df["count"]
-    pivot = (
-        df.pivot_table(
-            index=["variable", "bin"],
-            columns=time_col,
-            values="event_rate"
-        )
-        .sort_index(axis=1)          # ordena safras
-        .sort_index()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = (bin_tbl["event"].to_numpy(dtype=np.float64)
+                / bin_tbl["count"].to_numpy(dtype=np.float64))
+
+    # chaves fatorizadas → matriz densa (linha=(variable, bin), coluna=safra)
+    keys = pd.MultiIndex.from_arrays(
+        [bin_tbl["variable"], bin_tbl["bin"]], names=["variable", "bin"]
     )
-    return pivot
+    r_codes, rows = keys.factorize()
+    t_codes, times = pd.factorize(bin_tbl[time_col], sort=True)
+
+    # média por célula (como o aggfunc padrão do pivot_table), ignorando NaN
+    ok = (
+        (r_codes >= 0) & (t_codes >= 0) & ~np.isnan(rate)
+        & bin_tbl["variable"].notna().to_numpy() & bin_tbl["bin"].notna().to_numpy()
+    )
+    flat = r_codes[ok] * len(times) + t_codes[ok]
+    size = len(rows) * len(times)
+    total = np.bincount(flat, weights=rate[ok], minlength=size)
+    n = np.bincount(flat, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dense = (total / n).reshape(len(rows), len(times))
+
+    # pivot_table descarta linhas/safras sem nenhum valor
+    keep_r = n.reshape(len(rows), len(times)).any(axis=1)
+    keep_t = n.reshape(len(rows), len(times)).any(axis=0)
+    pivot = pd.DataFrame(
+        dense[keep_r][:, keep_t],
+        index=rows[keep_r].set_names(["variable", "bin"]),
+        columns=pd.Index(times[keep_t], name=time_col),
+    )
+    return pivot.sort_index()
 
 # ------------------------------------------------------------------ #
 def stability_table(pivot: pd.DataFrame) -> pd.DataFrame:
@@ -45,23 +66,98 @@ def stability_table(pivot: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame({"std": std, "range": rng})
 
 # ------------------------------------------------------------------ #
-def psi_over_time(pivot: pd.DataFrame) -> float:
-    """PSI global entre primeira e última safra."""
-    from .metrics import psi
-    first, last = pivot.columns[0], pivot.columns[-1]
-    df_tmp = pd.DataFrame(
-        {
-            "expected": pivot[first].values,
-            "actual": pivot[last].values
-        }
-    )
-    return psi(df_tmp)
+def psi_over_time(pivot: pd.DataFrame | np.ndarray) -> float:
+    """PSI global entre primeira e última safra (pivot ou matriz bin × safra)."""
+    from .metrics import _psi_arrays
+    curves = np.asarray(pivot, dtype=np.float64)
+    return _psi_arrays(curves[:, 0], curves[:, -1])
+
+# ------------------------------------------------------------------ #
+def _ks_statistic(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Estatística KS de duas amostras (a de ``scipy.stats.ks_2samp``, sem o
+    p-valor): maior distância entre as ECDFs nos pontos observados.
+    """
+    if a.size == 0 or b.size == 0:
+        raise ValueError("KS requer amostras não vazias")
+    if np.isnan(a).any() or np.isnan(b).any():
+        return float("nan")
+    a = np.sort(a)
+    b = np.sort(b)
+    x = np.concatenate([a, b])
+    # diferença das ECDFs em contagens inteiras (escala a.size * b.size) e
+    # uma única divisão → o mesmo arredondamento da fração exata
+    cnt_a = np.searchsorted(a, x, side="right").astype(np.int64)
+    cnt_b = np.searchsorted(b, x, side="right").astype(np.int64)
+    gap = np.max(np.abs(cnt_a * b.size - cnt_b * a.size))
+    return float(gap / (a.size * b.size))
+
+# ------------------------------------------------------------------ #
+def ks_over_time(pivot: pd.DataFrame | np.ndarray) -> float:
+    """
+    KS global entre primeira e última safra (distribuição de event-rate).
+    Aceita o pivot ou a matriz bin × safra já em NumPy.
+    """
+    curves = np.asarray(pivot, dtype=np.float64)
+    return _ks_statistic(curves[:, 0], curves[:, -1])
+
+# ------------------------------------------------------------------ #
+def _separability_from_curves(curves: np.ndarray) -> float:
+    """Distância média absoluta entre todas as curvas (linhas) de `curves`."""
+    from ._kernels import pair_separability
+    return pair_separability(curves)
 
 # ------------------------------------------------------------------ #
-def ks_over_time(pivot: pd.DataFrame) -> float:
-    """KS global entre primeira e última safra (distribuição de event-rate)."""
-    first, last = pivot.columns[0], pivot.columns[-1]
-    return ks_2samp(pivot[first], pivot[last]).statistic
+def _cell_table(
+    b_codes: np.ndarray,
+    b_uniques,
+    t_codes: np.ndarray,
+    t_uniques,
+    target: np.ndarray,
+    time_col: str,
+) -> pd.DataFrame:
+    """
+    Eventos/total por (bin, safra) com duas bincount sobre chaves
+    fatorizadas, no lugar de groupby(...).agg(["sum", "count"]); só células
+    observadas e sem NaN, como no groupby. A coluna de bin sai sempre como
+    ``"bin"`` (o nome esperado por ``event_rate_by_time``).
+    """
+    ok = (b_codes >= 0) & (t_codes >= 0)
+    flat = b_codes[ok].astype(np.int64) * len(t_uniques) + t_codes[ok]
+    size = len(b_uniques) * len(t_uniques)
+    event = np.bincount(flat, weights=target[ok], minlength=size)
+    count = np.bincount(flat, minlength=size)
+    cells = np.flatnonzero(count)
+    return pd.DataFrame({
+        "bin": b_uniques.take(cells // len(t_uniques)),
+        time_col: t_uniques.take(cells % len(t_uniques)),
+        "event": event[cells],
+        "count": count[cells],
+    })
+
+# ------------------------------------------------------------------ #
+def build_time_bin_panel(
+    df: pd.DataFrame,
+    bin_cols: list[str],
+    target_col: str,
+    time_col: str,
+) -> dict[str, pd.DataFrame]:
+    """
+    Pré-calcula eventos/contagens por (bin, safra) de várias colunas de bin.
+
+    A safra e o alvo são lidos uma única vez para todas as colunas. O
+    resultado (chave = coluna de bin) vai em ``temporal_separability_score(...,
+    panel=panel)``, que deixa de varrer `df` a cada variável.
+    """
+    t_codes, t_uniques = pd.factorize(df[time_col])
+    target = df[target_col].to_numpy()
+    panel = {}
+    for col in bin_cols:
+        b_codes, b_uniques = pd.factorize(df[col])
+        panel[col] = _cell_table(
+            b_codes, b_uniques, t_codes, t_uniques, target, time_col
+        )
+    return panel
 
 # ------------------------------------------------------------------ #
 def temporal_separability_score(
@@ -73,6 +169,7 @@ def temporal_separability_score(
     *,
     penalize_inversions: bool = False,
     penalize_low_freq: bool = False,
+    panel: dict[str, pd.DataFrame] | None = None,
 ) -> float:
     """Calcula a separação temporal entre os bins.
 
@@ -80,38 +177,41 @@ def temporal_separability_score(
     média das distâncias absolutas entre todas as combinações de curvas.
     Opcionalmente penaliza inversões de tendência ou bins com baixa
     contagem.
+
+    Com `panel` (de ``build_time_bin_panel``) as contagens de ``panel[bin_col]``
+    são reaproveitadas e `df` não é varrido.
     """
-    tbl = (
-        df.groupby([bin_col, time_col])[target_col]
-        .agg(["sum", "count"])
-        .reset_index()
-        .rename(columns={"sum": "event", "count": "count"})
-    )
-    tbl["variable"] = variable
+    # a ordem final vem do sort_index de event_rate_by_time
+    if panel is not None:
+        tbl = panel[bin_col]
+    else:
+        b_codes, b_uniques = pd.factorize(df[bin_col])
+        t_codes, t_uniques = pd.factorize(df[time_col])
+        tbl = _cell_table(
+            b_codes, b_uniques, t_codes, t_uniques,
+            df[target_col].to_numpy(), time_col,
+        )
+    tbl = tbl.assign(variable=variable)
     pivot = event_rate_by_time(tbl, time_col)
 
-    n_bins = pivot.shape[0]
-    if n_bins < 2:
+    if pivot.shape[0] < 2:
         return 0.0
 
-    curves = pivot.to_numpy()
-    dists = []
-    for i in range(n_bins):
-        for j in range(i + 1, n_bins):
-            dists.append(np.abs(curves[i] - curves[j]).mean())
-
-    score = float(np.mean(dists))
+    score = _separability_from_curves(pivot.to_numpy())
 
     if penalize_low_freq:
-        freq = tbl.groupby(bin_col)["count"].min()
+        freq = tbl.groupby("bin", sort=False, observed=True)["count"].min()
         low = (freq < 30).sum()
         score -= 0.1 * low
 
     if penalize_inversions:
-        for idx in pivot.index:
-            values = pivot.loc[idx].values
-            trend = np.sign(np.diff(values))
-            if np.unique(trend[trend != 0]).size > 1:
-                score -= 0.1
+        # bin com mais de um sinal (↑, ↓ ou NaN) entre safras consecutivas
+        trend = np.sign(np.diff(pivot.to_numpy(), axis=1))
+        n_signs = (
+            (trend > 0).any(axis=1).astype(int)
+            + (trend < 0).any(axis=1)
+            + np.isnan(trend).any(axis=1)
+        )
+        score -= 0.1 * int((n_signs > 1).sum())
 
     return score
@@ -1,12 +1,12 @@
 # nasabinning/utils/dtypes.py
 from __future__ import annotations
-import warnings, pandas as pd
-from typing import List, Optional, Tuple
+import re, warnings, pandas as pd
+from typing import List, Optional, Pattern, Tuple
 
 
 def search_dtypes(
     df: pd.DataFrame, 
-    target_col: str = 'target', 
+    target_col: Optional[str] = 'target', 
     limite_categorico: int = 50, 
     force_categorical: Optional[List[str]] = None, 
     verbose: bool = True, 
@@ -27,8 +27,9 @@ def search_dtypes(
     -----------
     df : pd.DataFrame
         DataFrame de entrada para análise
-    target_col : str, default 'target'
-        Nome da coluna target a ser excluída da análise
+    target_col : str ou None, default 'target'
+        Nome da coluna target a ser excluída da análise. Use None quando `df`
+        contém apenas as features (evita concatenar e depois remover o target)
     limite_categorico : int, default 50
         Máximo de valores únicos para considerar coluna object como categórica
     force_categorical : List[str], optional
@@ -60,14 +61,14 @@ def search_dtypes(
     if df.empty:
         raise ValueError("O DataFrame não pode estar vazio")
     
-    if not isinstance(target_col, str):
-        raise TypeError("O parâmetro 'target_col' deve ser uma string")
+    if target_col is not None and not isinstance(target_col, str):
+        raise TypeError("O parâmetro 'target_col' deve ser uma string ou None")
     
     if not isinstance(limite_categorico, int) or limite_categorico <= 0:
         raise ValueError("O parâmetro 'limite_categorico' deve ser um inteiro positivo")
     
     # Verifica se target_col existe no DataFrame
-    if target_col not in df.columns:
+    if target_col is not None and target_col not in df.columns:
         available_cols = ", ".join(df.columns.tolist()[:10])  # Mostra apenas primeiras 10
         suffix = "..." if len(df.columns) > 10 else ""
         raise ValueError(
@@ -88,6 +89,10 @@ def search_dtypes(
     if not isinstance(force_categorical, list):
         raise TypeError("O parâmetro 'force_categorical' deve ser uma lista de strings")
     
+    # Padrões de ID numa única regex (alternância), compilada uma vez e
+    # aplicada ao nome já em minúsculas: mesmo critério de substring
+    id_re = _compile_id_patterns(id_patterns)
+
     # Verifica se colunas em force_categorical existem
     missing_forced = [col for col in force_categorical if col not in df.columns]
     if missing_forced:
@@ -97,27 +102,38 @@ def search_dtypes(
         )
         force_categorical = [col for col in force_categorical if col in df.columns]
     
-    # Cria DataFrame sem a coluna target
-    try:
-        df_work = df.drop(columns=[target_col], errors='raise')
-    except KeyError as e:
-        raise ValueError(f"Erro ao remover coluna target: {e}")
+    # Cria DataFrame sem a coluna target (sem cópia quando não há target)
+    if target_col is None:
+        df_work = df
+    else:
+        try:
+            df_work = df.drop(columns=[target_col], errors='raise')
+        except KeyError as e:
+            raise ValueError(f"Erro ao remover coluna target: {e}")
     
     if verbose:
-        print(f"Analisando {len(df_work.columns)} colunas (excluindo target '{target_col}')...")
+        excl = f" (excluindo target '{target_col}')" if target_col is not None else ""
+        print(f"Analisando {len(df_work.columns)} colunas{excl}...")
         print("-" * 60)
     
+    # Estatísticas em lote (uma passada por bloco do pandas, não por coluna):
+    # não-nulos de todas as colunas e nunique das textuais candidatas
+    forced = set(force_categorical)
+    total_count = len(df_work)
+    non_null = df_work.count().to_numpy()
+    unique_counts = _bulk_text_nunique(df_work, non_null, forced)
+
     # Análise das colunas
-    for col in df_work.columns:
+    for pos, col in enumerate(df_work.columns):
         try:
             # Obter informações básicas da coluna
-            tipo = df_work[col].dtype
-            non_null_count = df_work[col].count()
-            total_count = len(df_work)
+            serie = df_work[col]
+            tipo = serie.dtype
+            non_null_count = non_null[pos]
             missing_pct = ((total_count - non_null_count) / total_count) * 100
             
             # Força colunas explicitamente marcadas como categóricas
-            if col in force_categorical:
+            if col in forced:
                 cat_cols.append(col)
                 if verbose:
                     print(f"✓ '{col}' -> CATEGÓRICA (forçada)")
@@ -133,26 +149,29 @@ def search_dtypes(
             # Classificação por tipo de dados
             if pd.api.types.is_numeric_dtype(tipo):
                 # Verifica se é uma coluna ID numérica
-                if remove_ids and _is_id_column(col, df_work[col], id_patterns):
+                if remove_ids and _is_id_column(col, serie, id_re):
                     ignored_cols.append(col)
                     if verbose:
                         print(f"🗑 '{col}' -> REMOVIDA (identificada como ID)")
                 else:
                     num_cols.append(col)
                     if verbose:
-                        unique_count = df_work[col].nunique(dropna=True)
+                        unique_count = serie.nunique(dropna=True)
                         print(f"📊 '{col}' -> NUMÉRICA ({unique_count} valores únicos)")
             
             elif tipo == 'object' or pd.api.types.is_string_dtype(tipo):
+                # nunique uma única vez por coluna (também usado no teste de ID)
+                unique_count = unique_counts.get(pos)
+                if unique_count is None:
+                    unique_count = serie.nunique(dropna=True)
+
                 # Remove IDs textuais se solicitado
-                if remove_ids and _is_id_column(col, df_work[col], id_patterns):
+                if remove_ids and _is_id_column(col, serie, id_re, unique_count):
                     ignored_cols.append(col)
                     if verbose:
                         print(f"🗑 '{col}' -> REMOVIDA (identificada como ID)")
                     continue
                 
-                unique_count = df_work[col].nunique(dropna=True)
-                
                 if unique_count <= limite_categorico:
                     cat_cols.append(col)
                     if verbose:
@@ -185,7 +204,7 @@ def search_dtypes(
     
     # Remoção adicional de IDs se solicitado
     if remove_ids:
-        num_cols, cat_cols = _remove_id_columns(num_cols, cat_cols, id_patterns, verbose)
+        num_cols, cat_cols = _remove_id_columns(num_cols, cat_cols, id_re, verbose)
     
     # Relatório final
     if verbose:
@@ -222,7 +241,43 @@ def search_dtypes(
     return num_cols, cat_cols
 
 
-def _is_id_column(col_name: str, col_data: pd.Series, id_patterns: List[str]) -> bool:
+def _is_text_dtype(tipo) -> bool:
+    """Mesmo critério do ramo textual de `search_dtypes` (após o numérico)."""
+    return not pd.api.types.is_numeric_dtype(tipo) and (
+        tipo == 'object' or pd.api.types.is_string_dtype(tipo)
+    )
+
+
+def _bulk_text_nunique(df: pd.DataFrame, non_null, forced: set) -> dict:
+    """
+    ``{posição: nunique}`` das colunas textuais que `search_dtypes` vai
+    classificar (não forçadas, até 90% ausentes), num único ``nunique``.
+    Se o lote falhar (ex.: valores não-hasheáveis) devolve ``{}`` e cada
+    coluna é tratada individualmente, com o mesmo erro por coluna de antes.
+    """
+    total = len(df)
+    pos = [
+        i for i, (col, tipo) in enumerate(zip(df.columns, df.dtypes))
+        if col not in forced
+        and (total - non_null[i]) / total * 100 <= 90
+        and _is_text_dtype(tipo)
+    ]
+    if not pos:
+        return {}
+    try:
+        counts = df.iloc[:, pos].nunique(dropna=True).to_numpy()
+    except Exception:
+        return {}
+    return dict(zip(pos, counts.tolist()))
+
+
+def _compile_id_patterns(id_patterns: List[str]) -> Pattern[str]:
+    """Regex que casa se o nome (em minúsculas) contém algum dos padrões."""
+    return re.compile("|".join(re.escape(p.lower()) for p in id_patterns))
+
+
+def _is_id_column(col_name: str, col_data: pd.Series, id_re: Pattern[str],
+                  unique_count: Optional[int] = None) -> bool:
     """
     Verifica se uma coluna é provavelmente um ID baseado no nome e características.
     
@@ -232,28 +287,30 @@ def _is_id_column(col_name: str, col_data: pd.Series, id_patterns: List[str]) ->
         Nome da coluna
     col_data : pd.Series
         Dados da coluna
-    id_patterns : List[str]
-        Padrões para identificar IDs
+    id_re : Pattern
+        Padrões de ID compilados por ``_compile_id_patterns``
+    unique_count : int, optional
+        ``col_data.nunique()`` já calculado (evita recontar)
     
     Retorna:
     --------
     bool
         True se a coluna for identificada como ID
     """
-    col_lower = col_name.lower()
-    
     # Verifica padrões no nome
-    name_match = any(pattern.lower() in col_lower for pattern in id_patterns)
+    name_match = id_re.search(col_name.lower()) is not None
     
     # Verifica características dos dados
-    unique_ratio = col_data.nunique() / len(col_data) if len(col_data) > 0 else 0
+    if unique_count is None:
+        unique_count = col_data.nunique()
+    unique_ratio = unique_count / len(col_data) if len(col_data) > 0 else 0
     high_uniqueness = unique_ratio > 0.95  # Mais de 95% de valores únicos
     
     return name_match or high_uniqueness
 
 
 def _remove_id_columns(num_cols: List[str], cat_cols: List[str], 
-                      id_patterns: List[str], verbose: bool) -> Tuple[List[str], List[str]]:
+                      id_re: Pattern[str], verbose: bool) -> Tuple[List[str], List[str]]:
     """
     Remove colunas identificadas como IDs das listas de colunas numéricas e categóricas.
     
@@ -263,8 +320,8 @@ def _remove_id_columns(num_cols: List[str], cat_cols: List[str],
         Lista de colunas numéricas
     cat_cols : List[str]
         Lista de colunas categóricas
-    id_patterns : List[str]
-        Padrões para identificar IDs
+    id_re : Pattern
+        Padrões de ID compilados por ``_compile_id_patterns``
     verbose : bool
         Se True, imprime remoções
     
@@ -279,7 +336,7 @@ def _remove_id_columns(num_cols: List[str], cat_cols: List[str],
     # Remove IDs das colunas numéricas
     num_cols_filtered = []
     for col in num_cols:
-        if not any(pattern.lower() in col.lower() for pattern in id_patterns):
+        if id_re.search(col.lower()) is None:
             num_cols_filtered.append(col)
         elif verbose:
             print(f"🗑 Removendo '{col}' das numéricas (padrão ID detectado)")
@@ -287,7 +344,7 @@ def _remove_id_columns(num_cols: List[str], cat_cols: List[str],
     # Remove IDs das colunas categóricas
     cat_cols_filtered = []
     for col in cat_cols:
-        if not any(pattern.lower() in col.lower() for pattern in id_patterns):
+        if id_re.search(col.lower()) is None:
             cat_cols_filtered.append(col)
         elif verbose:
             print(f"🗑 Removendo '{col}' das categóricas (padrão ID detectado)")
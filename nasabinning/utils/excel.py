@@ -0,0 +1,65 @@
+"""
+Escrita de planilhas Excel com memória constante.
+
+Com XlsxWriter em ``constant_memory`` cada linha é descarregada no disco assim
+que a próxima começa, mas isso exige escrita estritamente linha a linha — e o
+``DataFrame.to_excel`` do pandas escreve coluna a coluna (no modo constant_memory
+as linhas anteriores seriam perdidas). Por isso as abas são escritas aqui via
+``worksheet.write_row``. Sem XlsxWriter instalado recorre-se ao ``to_excel``.
+"""
+from __future__ import annotations
+
+import numbers
+from pathlib import Path
+from typing import Union
+
+import pandas as pd
+
+PathLike = Union[str, Path]
+
+
+def _has_xlsxwriter() -> bool:
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def excel_writer(path: PathLike) -> pd.ExcelWriter:
+    """``pd.ExcelWriter`` em modo constant_memory quando XlsxWriter existe."""
+    if _has_xlsxwriter():
+        return pd.ExcelWriter(
+            path,
+            engine="xlsxwriter",
+            engine_kwargs={"options": {"constant_memory": True}},
+        )
+    return pd.ExcelWriter(path)
+
+
+def _cell(value):
+    """Converte para um tipo aceito por ``write_row`` (NaN → célula vazia)."""
+    if not pd.api.types.is_scalar(value):   # listas/arrays (ex.: bins categóricos)
+        return str(value)
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (str, bool, numbers.Number)):
+        return value
+    return str(value)
+
+
+def write_frame(
+    writer: pd.ExcelWriter, df: pd.DataFrame, sheet_name: str, *, index: bool = True
+) -> None:
+    """Escreve `df` numa nova aba, linha a linha quando o engine é XlsxWriter."""
+    if writer.engine != "xlsxwriter":
+        df.to_excel(writer, sheet_name=sheet_name, index=index)
+        return
+
+    ws = writer.book.add_worksheet(sheet_name)
+    frame = df.reset_index() if index else df
+    # como no to_excel: índice sem nome fica com cabeçalho vazio
+    header = [*df.index.names, *df.columns] if index else list(df.columns)
+    ws.write_row(0, 0, [_cell(c) for c in header])
+    for r, row in enumerate(frame.itertuples(index=False, name=None), start=1):
+        ws.write_row(r, 0, [_cell(v) for v in row])
@@ -6,23 +6,34 @@ Usa Matplotlib (sem cores explícitas, conforme guidelines).
 
 from __future__ import annotations
 
+from functools import lru_cache
+from pathlib import Path
+
+import matplotlib.colors as mcolors
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-import seaborn as sns
 # --------------------------------------------------------- #
 # 1C. Obtém event-rate médio de cada bin (por variável)
 # --------------------------------------------------------- #
-def _bin_event_rate_map(binner, var: str) -> dict[str, float]:
+_EXCLUDED_BINS = frozenset({"Special", "Missing"})
+
+
+def _bin_event_rate_maps(binner) -> dict[str, dict[str, float]]:
     """
-    Retorna {label_intervalo: event_rate_medio} para a variável `var`,
-    excluindo Special / Missing.
+    Retorna {variável: {label_intervalo: event_rate_medio}} para todas as
+    variáveis de uma vez, excluindo Special / Missing.
     """
-    bs = (
-        binner._bin_summary_[binner._bin_summary_["variable"] == var]
-        .loc[~binner._bin_summary_["bin"].isin(["Special", "Missing"])]
-        .copy()
-    )
-    return {str(row["bin"]): row["event_rate"] for _, row in bs.iterrows()}
+    summary = binner.bin_summary
+    bs = summary.loc[~summary["bin"].isin(_EXCLUDED_BINS)]
+    # um único filtro + groupby (no lugar de duas máscaras sobre a tabela
+    # inteira a cada variável); colunas inteiras, sem iterrows
+    labels = bs["bin"].astype(str).to_numpy()
+    rates = bs["event_rate"].to_numpy()
+    return {
+        var: dict(zip(labels[idx], rates[idx]))
+        for var, idx in bs.groupby("variable", sort=False, observed=True).indices.items()
+    }
 
 # --------------------------------------------------------- #
 # Traduz códigos de bin (floats) → rótulos de intervalo
@@ -35,6 +46,13 @@ def _infer_bin_label_map(var: str, grp: pd.DataFrame, label_mapper):
     base_map = label_mapper(var)                # mapa original (idx → texto)
     unique_codes = sorted(grp["bin"].unique())  # códigos que aparecem no gráfico
 
+    # Array indexado pelo código (cache do NASABinner): lookup direto
+    if isinstance(base_map, np.ndarray):
+        codes = np.asarray(unique_codes, dtype=float)
+        if np.all((codes >= 0) & (codes < len(base_map)) & (codes == codes.round())):
+            return dict(zip(unique_codes, base_map[codes.astype(np.intp)]))
+        return dict(zip(unique_codes, base_map))
+
     # Caso raro: o pivot já tenha as chaves exatas do mapa original
     if all(code in base_map for code in unique_codes):
         return {code: base_map[code] for code in unique_codes}
@@ -88,12 +106,59 @@ def _place_legend_bottom(ax, n_items: int):
 # ------------------------------------------------------------------ #
 HEX_BASE = "#023059"             # Azul mais escuro
 HEX_MIN  = "#B5C1CD"             # Azul mais claro permitido
+_RGB_BASE = np.array(mcolors.to_rgb(HEX_BASE))
+_RGB_MIN = np.array(mcolors.to_rgb(HEX_MIN))
 
-def _blend_palette(n: int) -> list[str]:
-    """Gera `n` tons de azul do claro (HEX_MIN) ao escuro (HEX_BASE)."""
+@lru_cache(maxsize=32)
+def _blend_palette(n: int) -> tuple:
+    """
+    Gera `n` tons de azul do claro (HEX_MIN) ao escuro (HEX_BASE).
+    Interpolação linear direta em RGB (sem montar colormap); memoizada,
+    por isso devolve tupla (imutável, segura para compartilhar).
+    """
     if n <= 0:
-        return []
-    return sns.blend_palette([HEX_MIN, HEX_BASE], n, as_cmap=False)
+        return ()
+    t = np.linspace(0.0, 1.0, n)[:, None]
+    rgb = _RGB_MIN * (1.0 - t) + _RGB_BASE * t
+    return tuple(map(tuple, rgb.tolist()))
+
+
+# ------------------------------------------------------------------ #
+# Figura / desenho de um painel (uma variável)
+# ------------------------------------------------------------------ #
+def _new_figure(n_axes: int, figsize, backend: str):
+    """Figura com `n_axes` eixos empilhados (altura de `figsize` por eixo)."""
+    size = (figsize[0], figsize[1] * n_axes)
+    if backend == "agg":
+        # fora do pyplot: canvas Agg, sem gerenciador de janelas
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=size)
+        axes = fig.subplots(n_axes, 1, squeeze=False)
+    else:
+        fig, axes = plt.subplots(n_axes, 1, figsize=size, squeeze=False)
+    return fig, axes[:, 0]
+
+
+def _draw_panel(ax, panel, title_prefix, time_col_label):
+    """Desenha em `ax` as curvas (label × safra) de uma variável."""
+    var, wide, color_map, ordered_safras = panel
+    for lbl, rates in zip(wide.index, wide.to_numpy()):
+        ax.plot(
+            range(len(ordered_safras)),
+            rates * 100,
+            marker="o",
+            linewidth=1.5,
+            label=lbl,
+            color=color_map[lbl],
+        )
+
+    prefix = f"{title_prefix} – " if title_prefix else ""
+    ax.set_title(f"{prefix}{var}")
+    ax.set_ylabel("Event Rate (%)")
+
+    _format_time_axis(ax, ordered_safras, time_col_label or "Safra")
+    _place_legend_bottom(ax, n_items=len(color_map))
+    _remove_background_grid(ax)
 
 
 # ------------------------------------------------------------------ #
@@ -107,59 +172,109 @@ def plot_event_rate_stability(
     title_prefix: str | None = "Estabilidade temporal",
     time_col_label: str | None = None,
     figsize=(14, 6),
+    backend: str = "auto",
+    save_dir: str | Path | None = None,
+    single_figure: bool = False,
 ):
+    """
+    Um gráfico de event rate por safra para cada variável do `pivot`.
+
+    ``backend="auto"`` exibe cada figura com ``plt.show()``. ``backend="agg"``
+    é o modo batch (relatórios): as figuras são criadas fora do pyplot (canvas
+    Agg, sem gerenciador de janelas nem troca do backend global), salvas em
+    ``save_dir/<variável>.png`` e liberadas; retorna a lista de arquivos.
+
+    ``single_figure=True`` desenha todas as variáveis numa única figura, um
+    eixo por variável (``figsize`` vale por eixo): uma só alocação de canvas
+    e um só ``tight_layout``. No modo agg o arquivo é
+    ``save_dir/event_rate_stability.png``.
+    """
+    if backend not in {"auto", "agg"}:
+        raise ValueError("backend deve ser 'auto' ou 'agg'")
+    if backend == "agg":
+        if save_dir is None:
+            raise ValueError("backend='agg' requer save_dir")
+        save_dir = Path(save_dir)
+        save_dir.mkdir(parents=True, exist_ok=True)
+    saved = []
+
     if label_mapper is None:
         label_mapper = lambda var: binner._bin_code_to_label(var)
 
-    df_long = (
-        pivot
-        .reset_index()
-        .melt(id_vars=["variable", "bin"], var_name="safra", value_name="event_rate")
-        .dropna(subset=["event_rate"])
-    )
+    # Special/Missing saem antes do reshape (quando o índice já traz rótulos);
+    # o formato longo vem direto das células não-NaN da matriz, no lugar de
+    # reset_index + melt + dropna (uma cópia por etapa)
+    pivot = pivot[~pivot.index.get_level_values("bin").isin(_EXCLUDED_BINS)]
+    # só exibição: float32 basta e a matriz fica contígua por linha (bin)
+    values = np.ascontiguousarray(pivot.to_numpy(dtype=np.float32))
+    r, c = np.nonzero(~np.isnan(values))
+    df_long = pd.DataFrame({
+        "variable": pivot.index.get_level_values("variable")[r],
+        "bin": pivot.index.get_level_values("bin")[r],
+        "safra": pivot.columns[c],
+        "event_rate": values[r, c],
+    })
 
-    # loop por variável
-    for var, grp in df_long.groupby("variable", sort=False):
+    er_maps = _bin_event_rate_maps(binner)    # invariante do loop
+    # safras ordenadas uma vez; cada variável usa o subconjunto presente
+    all_safras = np.sort(pivot.columns.unique().to_numpy())
+
+    # loop por variável: prepara os dados de cada painel
+    panels = []
+    for var, grp in df_long.groupby("variable", sort=False, observed=True):
         # ---------- mapeia código → texto ----------
         code2label = _infer_bin_label_map(var, grp, label_mapper)
         grp = grp.assign(BinLabel=grp["bin"].map(code2label))
 
         # ---------- remove Special / Missing ----------
-        grp = grp[~grp["BinLabel"].str.contains("Special|Missing", case=False, na=False)]
+        # labels vêm exatos do bin_summary (mesmos nomes do optbinning)
+        grp = grp[~grp["BinLabel"].isin(_EXCLUDED_BINS)]
         if grp.empty:
             continue  # nada a plotar
 
         # ---------- event-rate médio p/ ordenar cores ----------
-        er_map = _bin_event_rate_map(binner, var)
+        er_map = er_maps.get(var, {})
         # usa somente labels que estão no grp
         er_map = {lbl: er_map.get(lbl, float("nan")) for lbl in grp["BinLabel"].unique()}
 
-        # ordena pelo event-rate asc (NaN primeiro) ⇒ +escuro = +alto
-        ordered_labels = sorted(er_map, key=lambda x: (pd.isna(er_map[x]), er_map[x]))
+        # ordena pelo event-rate asc (NaN por último) ⇒ +escuro = +alto;
+        # lexsort é estável, como o sorted com chave (isna, rate)
+        labels = np.array(list(er_map), dtype=object)
+        rates = np.fromiter(er_map.values(), dtype=np.float64, count=len(er_map))
+        ordered_labels = labels[np.lexsort((rates, np.isnan(rates)))].tolist()
         palette = _blend_palette(len(ordered_labels))
         color_map = dict(zip(ordered_labels, palette))  # claro→escuro
 
-        ordered_safras = sorted(grp["safra"].unique())
-        fig, ax = plt.subplots(figsize=figsize)
-
-        for lbl, g in grp.groupby("BinLabel"):
-            g_plot = g.set_index("safra").reindex(ordered_safras).reset_index()
-            ax.plot(
-                range(len(ordered_safras)),
-                g_plot["event_rate"] * 100,
-                marker="o",
-                linewidth=1.5,
-                label=lbl,
-                color=color_map[lbl],
-            )
-
-        prefix = f"{title_prefix} – " if title_prefix else ""
-        ax.set_title(f"{prefix}{var}")
-        ax.set_ylabel("Event Rate (%)")
-
-        _format_time_axis(ax, ordered_safras, time_col_label or "Safra")
-        _place_legend_bottom(ax, n_items=len(ordered_labels))
-        _remove_background_grid(ax)
-
-        plt.tight_layout()
-        plt.show()
+        ordered_safras = all_safras[np.isin(all_safras, grp["safra"].unique())]
+
+        # matriz label × safra numa passada (média consolida códigos que
+        # caem no mesmo label); cada linha vai direto para o ax.plot
+        wide = grp.pivot_table(
+            index="BinLabel", columns="safra", values="event_rate", aggfunc="mean"
+        ).reindex(columns=ordered_safras)
+        panels.append((var, wide, color_map, ordered_safras))
+
+    # ---------- desenho: uma figura por variável ou todas numa só ----------
+    if single_figure:
+        groups = [(panels, "event_rate_stability")] if panels else []
+    else:
+        groups = [([panel], panel[0]) for panel in panels]
+
+    for group, name in groups:
+        fig, axes = _new_figure(len(group), figsize, backend)
+        for ax, panel in zip(axes, group):
+            _draw_panel(ax, panel, title_prefix, time_col_label)
+
+        fig.tight_layout()
+        if backend == "agg":
+            path = save_dir / f"{name}.png"
+            fig.savefig(path)
+            saved.append(path)
+        else:
+            plt.show()
+            # o pyplot mantém a figura viva após o show em backends não
+            # interativos: fecha para a memória não crescer com o nº de variáveis
+            plt.close(fig)
+
+    if backend == "agg":
+        return saved
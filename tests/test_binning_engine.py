@@ -20,3 +20,144 @@ def test_basic_fit_transform():
     # IV calculado
     assert hasattr(binner, "iv_")
     assert binner.iv_ > 0
+
+
+def test_fit_does_not_mutate_params():
+    from sklearn.base import clone
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"x": rng.normal(size=200)})
+    y = (X["x"] > 0).astype(int)
+    kwargs = {"n_trials": 5, "min_bin_size": 0.05}
+    binner = NASABinner(strategy_kwargs=kwargs).fit(X, y)
+    assert kwargs == {"n_trials": 5, "min_bin_size": 0.05}
+    assert clone(binner).get_params()["strategy_kwargs"] == kwargs
+
+
+def test_stability_over_time_pivot():
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({"x": rng.normal(size=600)})
+    X["safra"] = rng.choice([202301, 202302, 202303], size=600)
+    y = (X["x"] + rng.normal(scale=0.5, size=600) > 0).astype(int)
+
+    binner = NASABinner(max_bins=4).fit(X[["x"]], y)
+    pivot = binner.stability_over_time(X, y, time_col="safra")
+    assert list(pivot.columns) == [202301, 202302, 202303]
+    assert pivot.index.names == ["variable", "bin"]
+    assert ((pivot >= 0) & (pivot <= 1)).all().all()
+
+    # código do pivot = linha do bin_summary: taxa média acompanha o resumo
+    rates = binner.bin_summary.loc[binner.bin_summary["variable"] == "x", "event_rate"]
+    mean_rate = pivot.loc["x"].mean(axis=1)
+    assert np.allclose(mean_rate.to_numpy(), rates.to_numpy()[mean_rate.index], atol=0.1)
+    assert mean_rate.is_monotonic_increasing
+
+
+def test_transform_subset_of_columns():
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame({"x1": rng.normal(size=300), "x2": rng.normal(size=300)})
+    y = (X["x1"] + rng.normal(size=300) > 0).astype(int)
+    binner = NASABinner(max_bins=4).fit(X, y)
+
+    Xt = binner.transform(X[["x2"]])
+    assert list(Xt.columns) == ["x2"]
+    assert Xt["x2"].equals(binner.transform(X)["x2"])
+
+
+def test_fitted_binner_pickle_roundtrip():
+    import pickle
+    rng = np.random.default_rng(4)
+    X = pd.DataFrame({"x": rng.normal(size=300)})
+    y = (X["x"] + rng.normal(size=300) > 0).astype(int)
+    binner = NASABinner(max_bins=4).fit(X, y)
+
+    restored = pickle.loads(pickle.dumps(binner))
+    assert restored.transform(X).equals(binner.transform(X))
+
+
+def test_cache_dir_reuses_column_fits(tmp_path):
+    rng = np.random.default_rng(5)
+    X = pd.DataFrame({"x": rng.normal(size=300)})
+    y = (X["x"] + rng.normal(size=300) > 0).astype(int)
+
+    first = NASABinner(max_bins=4, cache_dir=str(tmp_path)).fit(X, y)
+    second = NASABinner(max_bins=4, cache_dir=str(tmp_path)).fit(X, y)
+    assert any(tmp_path.iterdir())
+    pd.testing.assert_frame_equal(first.bin_summary, second.bin_summary)
+
+
+def test_transform_sees_inplace_changes():
+    rng = np.random.default_rng(6)
+    X = pd.DataFrame({"x": rng.normal(size=300)})
+    y = (X["x"] + rng.normal(size=300) > 0).astype(int)
+    binner = NASABinner(max_bins=4)
+
+    first = binner.fit_transform(X, y)
+    X.iloc[:, 0] = -X["x"]                      # mesmo objeto, valores novos
+    assert not binner.transform(X).equals(first)
+
+
+def test_bin_summary_keeps_numeric_dtypes():
+    rng = np.random.default_rng(7)
+    X = pd.DataFrame({"x": rng.normal(size=300)})
+    y = (X["x"] + rng.normal(size=300) > 0).astype(int)
+    binner = NASABinner(max_bins=4).fit(X, y)
+    bs = binner.bin_summary
+    assert bs["count"].dtype == np.int64
+    assert bs["event_rate"].dtype == np.float64
+    assert int(binner._var_groups_["x"]["count"].sum()) == int(bs["count"].sum()) == len(X)
+
+
+def test_bin_summary_keys_stay_public_dtype():
+    rng = np.random.default_rng(8)
+    X = pd.DataFrame({"x": rng.normal(size=300), "c": rng.choice(list("abc"), 300)})
+    y = (X["x"] + rng.normal(size=300) > 0).astype(int)
+    binner = NASABinner(max_bins=4).fit(X, y)
+
+    assert binner.bin_summary["variable"].dtype == object
+    assert binner.bin_summary["bin"].dtype == object
+    assert set(binner._var_groups_) == {"x", "c"}
+
+
+def test_optuna_sqlite_storage_fits_every_feature(tmp_path):
+    import optuna
+    rng = np.random.default_rng(9)
+    X = pd.DataFrame({"x1": rng.normal(size=300), "x2": rng.normal(size=300)})
+    y = (X["x1"] + rng.normal(size=300) > 0).astype(int)
+    storage = f"sqlite:///{tmp_path / 'nasa.db'}"
+
+    binner = NASABinner(
+        max_bins=4, use_optuna=True, n_jobs=2, study_storage=storage,
+        strategy_kwargs={"n_trials": 2},
+    ).fit(X, y)
+    assert set(binner.best_params_) == {"x1", "x2"}
+    assert len(optuna.get_all_study_summaries(storage)) == 2
+
+
+def test_stability_over_time_keeps_merged_categories():
+    rng = np.random.default_rng(10)
+    X = pd.DataFrame({"c": rng.choice(list("abcdefgh"), size=3000)})
+    rate = X["c"].map(dict(a=.1, b=.11, c=.12, d=.3, e=.31, f=.5, g=.52, h=.8))
+    y = pd.Series((rng.random(3000) < rate).astype(int))
+    X["safra"] = rng.choice([1, 2, 3], size=3000)
+
+    binner = NASABinner(max_bins=6).fit(X[["c"]], y)
+    counts = binner.bin_summary["count"].to_numpy()
+    assert len(counts) < 8                      # refine_bins fundiu categorias
+
+    # toda linha cai no bin do resumo que a contou: nada vira -1
+    codes = binner._bin_codes("c", X["c"])
+    assert np.array_equal(np.bincount(codes[codes >= 0], minlength=len(counts)), counts)
+    pivot = binner.stability_over_time(X, y, time_col="safra")
+    assert len(pivot.loc["c"]) == len(counts)
+
+
+def test_strategy_kwargs_reach_categorical_binning():
+    rng = np.random.default_rng(11)
+    X = pd.DataFrame({"c": rng.choice(list("abcdef"), size=1000)})
+    y = pd.Series((rng.random(1000) < np.where(X["c"] == "a", 0.5, 0.2)).astype(int))
+
+    binner = NASABinner(
+        max_bins=4, strategy_kwargs={"time_limit": 7, "max_n_prebins": 5},
+    ).fit(X, y)
+    strat = binner._per_feature_binners["c"]
+    assert (strat.time_limit, strat.max_n_prebins) == (7, 5)
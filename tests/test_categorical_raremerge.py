@@ -0,0 +1,41 @@
+import pandas as pd
+from nasabinning.strategies.categorical import _merge_rare
+
+def test_merge_rare_takes_place_of_first_rare_category():
+    s = pd.Series(["c", "a", "b", "d", "a", None, "c"] * 10).astype("category")
+    s.iloc[:2] = ["b", "d"]          # b e d ficam abaixo de 20%
+    merged = _merge_rare(s, 0.2)
+    assert merged.cat.categories.tolist() == ["a", "_RARE_", "c"]
+    assert merged.isna().sum() == s.isna().sum()
+    assert (merged == "_RARE_").sum() == s.isin(["b", "d"]).sum()
+
+
+def test_transform_lookup_matches_optimal_binning():
+    import numpy as np
+    from nasabinning.strategies.categorical import CategoricalBinning
+
+    rng = np.random.default_rng(0)
+    x = rng.choice(list("abcdef"), 2000).astype(object)
+    x[rng.random(2000) < 0.05] = None
+    y = (rng.random(2000) < np.where(x == "a", 0.5, 0.2)).astype(int)
+
+    cb = CategoricalBinning().fit(pd.DataFrame({"c": x}), pd.Series(y))
+    ob, kind = cb._encoder
+    assert kind == "woe"                         # OptimalBinning, sem fallback
+    new = pd.DataFrame({"c": ["a", "zz", None, "f", "b", "a"]})
+    expected = ob.transform(new["c"].astype("category").to_numpy(), metric="bins")
+    assert cb.transform(new)["c"].tolist() == list(expected)
+
+
+def test_bin_mapping_from_fitted_optimal_binning():
+    import numpy as np
+    from nasabinning import NASABinner
+
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({"c": rng.choice(list("abcdef"), 2000)})
+    y = pd.Series((rng.random(2000) < np.where(X["c"] == "a", 0.5, 0.2)).astype(int))
+    binner = NASABinner(max_bins=4).fit(X, y)
+
+    mapping = binner.get_bin_mapping("c").set_index("categoria")["bin"]
+    assert set(mapping.index) == set("abcdef")
+    assert (mapping == binner.transform(pd.DataFrame({"c": mapping.index}))["c"].to_numpy()).all()
@@ -14,3 +14,18 @@ def test_compare_two_strategies():
     res = cmp.fit_compare(X, y)
     assert {"sup", "unsup"} <= set(res.index)
     assert res.loc["sup", "iv"] > 0            # supervised tem IV calculado
+
+
+def test_parallel_pool_runs_inner_binners_sequentially():
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame({"x": rng.normal(size=200)})
+    y = (X["x"] > 0).astype(int)
+    configs = [dict(strategy="supervised", max_bins=4, name="sup")]
+
+    par = BinComparator(configs, n_jobs=2)
+    par.fit_compare(X, y)
+    assert par.results_[0]["binner"].n_jobs == 1
+    seq = BinComparator(configs, n_jobs=1)
+    seq.fit_compare(X, y)
+    assert seq.results_[0]["binner"].n_jobs == -1
+
@@ -0,0 +1,23 @@
+import pandas as pd
+import numpy as np
+from nasabinning.utils.excel import excel_writer, write_frame
+
+
+def test_write_frame_keeps_every_row(tmp_path):
+    df = pd.DataFrame({"bin": ["a", "b", None], "event_rate": [0.1, np.nan, 0.3]})
+    path = tmp_path / "out.xlsx"
+    with excel_writer(path) as writer:
+        write_frame(writer, df, "tbl", index=False)
+    back = pd.read_excel(path, sheet_name="tbl")
+    assert back.shape == (3, 2)
+    assert back["event_rate"].iloc[2] == 0.3 and back["bin"].iloc[1] == "b"
+
+
+def test_write_frame_stringifies_non_scalar_cells(tmp_path):
+    # bins categóricos do optbinning chegam como listas/arrays de categorias
+    df = pd.DataFrame({"bin": [["a", "b"], np.array(["c"]), "d"], "count": [1, 2, 3]})
+    path = tmp_path / "out.xlsx"
+    with excel_writer(path) as writer:
+        write_frame(writer, df, "tbl", index=False)
+    back = pd.read_excel(path, sheet_name="tbl")
+    assert back["bin"].tolist() == ["['a', 'b']", "['c']", "d"]
@@ -0,0 +1,76 @@
+import numpy as np
+from nasabinning import _kernels
+from nasabinning._kernels import hist2d
+
+def test_hist2d_counts_events_and_totals():
+    rng = np.random.default_rng(7)
+    bins = rng.integers(0, 4, size=500)
+    times = rng.integers(0, 3, size=500)
+    y = rng.integers(0, 2, size=500)
+    out = hist2d(bins, times, y, 4, 3)
+    assert out.shape == (4, 3, 2)
+    assert out[..., 1].sum() == 500
+    assert out[..., 0].sum() == y.sum()
+    mask = (bins == 2) & (times == 1)
+    assert out[2, 1, 0] == y[mask].sum() and out[2, 1, 1] == mask.sum()
+    # fallback NumPy deve coincidir com o kernel ativo
+    assert np.array_equal(out, _kernels._hist2d_numpy(bins, times, y, 4, 3))
+
+
+def test_hist2d_multi_stacks_per_variable_histograms():
+    rng = np.random.default_rng(9)
+    codes = rng.integers(-1, 3, size=(400, 2)).astype(np.int16)
+    times = rng.integers(-1, 4, size=400)
+    y = rng.integers(0, 2, size=400)
+    out = _kernels.hist2d_multi(codes, times, y, [3, 3], 4)
+    assert out.shape == (6, 4, 2)
+    for j in range(2):
+        ok = (codes[:, j] >= 0) & (times >= 0)
+        ref = hist2d(codes[ok, j], times[ok], y[ok], 3, 4)
+        assert np.array_equal(out[3 * j: 3 * j + 3], ref)
+
+
+def test_merge_by_delta_merges_neighbours_left_to_right():
+    count = np.array([10, 10, 10, 10])
+    event = np.array([1, 1, 5, 9])
+    er = event / count
+    c, e, n, r, start = _kernels.merge_by_delta(count, event, count - event, er, 0.05)
+    # 0.1 ~ 0.1 fundem; 0.1 vs 0.5 e 0.5 vs 0.9 ficam separados
+    assert start.tolist() == [0, 2, 3]
+    assert c.tolist() == [20, 10, 10] and e.tolist() == [2, 5, 9]
+    assert np.allclose(r, [0.1, 0.5, 0.9])
+    # entradas não são alteradas
+    assert count.tolist() == [10, 10, 10, 10]
+
+
+def test_merge_monotonic_pools_adjacent_violators():
+    count = np.array([10, 10, 10, 10])
+    event = np.array([1, 5, 3, 9])
+    er = event / count
+    c, e, n, r, start, left, right = _kernels.merge_monotonic(
+        count, event, count - event, er, "ascending"
+    )
+    # 0.5 > 0.3 viola a tendência: bins 1 e 2 viram um só (0.4)
+    assert start.tolist() == [0, 1, 3]
+    assert np.allclose(r, [0.1, 0.4, 0.9]) and np.all(np.diff(r) >= 0)
+    assert list(zip(left, right)) == [(1, 2)]
+
+
+def test_digitize_columns_matches_sklearn_rule():
+    from sklearn.preprocessing import KBinsDiscretizer
+    rng = np.random.default_rng(2)
+    X = np.column_stack([rng.normal(size=300), rng.uniform(size=300)])
+    kbd = KBinsDiscretizer(n_bins=5, encode="ordinal", strategy="quantile").fit(X)
+    out = _kernels.digitize_columns(X, [e[1:-1] for e in kbd.bin_edges_])
+    np.testing.assert_array_equal(out, kbd.transform(X))
+
+
+def test_pair_separability_matches_pairwise_mean():
+    rng = np.random.default_rng(3)
+    curves = rng.random((6, 4))
+    expected = np.mean([
+        np.abs(curves[i] - curves[j]).mean()
+        for i in range(6) for j in range(i + 1, 6)
+    ])
+    assert np.isclose(_kernels.pair_separability(curves), expected)
+    assert _kernels.pair_separability(curves[:1]) == 0.0
@@ -0,0 +1,21 @@
+import pandas as pd
+import numpy as np
+from nasabinning.metrics import iv, psi
+
+def test_psi_floor_does_not_touch_input():
+    df = pd.DataFrame({"expected": [0.2, 0.0, 0.8], "actual": [0.3, 0.1, 0.0]})
+    before = df.copy()
+    exp = np.clip(before["expected"].to_numpy(), 1e-9, None)
+    act = np.clip(before["actual"].to_numpy(), 1e-9, None)
+    assert psi(df) == float(np.sum((act - exp) * np.log(act / exp)))
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_iv_degenerate_table_is_zero():
+    tbl = pd.DataFrame({
+        "variable": ["a", "a", "b", "b"],
+        "event": [0, 0, 3, 5],
+        "non_event": [10, 20, 40, 30],
+    })
+    assert iv(tbl[tbl["variable"] == "a"]) == 0.0
+    assert iv(tbl[tbl["variable"] == "b"]) > 0.0
@@ -9,3 +9,77 @@ def test_optuna_runs_quickly():
     best, binner = optimize_bins(X, y, n_trials=5, strategy="supervised")
     assert 3 <= best["max_bins"] <= 10
     assert isinstance(binner.iv_, float)
+
+
+def test_optuna_study_resumes_from_storage(tmp_path):
+    import optuna
+    import pytest
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame({"x": rng.normal(size=120)})
+    y = (X["x"] > 0).astype(int)
+    storage = f"sqlite:///{tmp_path / 'nasa.db'}"
+    for _ in range(2):
+        optimize_bins(X, y, n_trials=3, storage=storage, study_name="x")
+    study = optuna.load_study(study_name="x", storage=storage)
+    assert len(study.trials) == 6
+    with pytest.raises(optuna.exceptions.DuplicatedStudyError):
+        optimize_bins(X, y, n_trials=1, storage=storage, study_name="x",
+                      load_if_exists=False)
+
+
+def test_optuna_joint_study_per_feature_results():
+    from nasabinning.optuna_optimizer import optimize_bins_joint
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame({"x": rng.normal(size=200), "z": rng.normal(size=200)})
+    y = (X["x"] > 0).astype(int)
+    best, binners = optimize_bins_joint(X, y, n_trials=4, strategy="supervised")
+    assert set(best) == set(binners) == {"x", "z"}
+    assert all(3 <= p["max_bins"] <= 10 for p in best.values())
+
+
+def test_optuna_iv_psi_scoring():
+    import optuna
+    import pytest
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame({"x": rng.normal(size=300)})
+    t = pd.Series(rng.choice([202301, 202302, 202303], size=300))
+    y = (X["x"] + rng.normal(size=300) > 0).astype(int)
+    storage = optuna.storages.InMemoryStorage()
+    optimize_bins(X, y, time_col="safra", time_values=t, n_trials=3,
+                  scoring="iv_psi", storage=storage, study_name="s")
+    tr = optuna.load_study(study_name="s", storage=storage).trials[0]
+    attrs = tr.user_attrs
+    assert np.isclose(tr.value, attrs["iv"] - 0.5 * attrs["psi"] - 0.01 * attrs["n_bins"])
+    with pytest.raises(ValueError):
+        optimize_bins(X, y, n_trials=1, scoring="foo")
+
+
+def test_codes_cache_reuses_transform_for_same_splits():
+    from nasabinning.optuna_optimizer import _CodesCache, _fit_binner, _score_binner
+    rng = np.random.default_rng(4)
+    X = pd.DataFrame({"x": rng.normal(size=400)})
+    t = pd.Series(rng.choice([1, 2, 3], size=400))
+    y = (X["x"] + rng.normal(size=400) > 0).astype(int)
+    params = dict(max_bins=4, min_bin_size=0.05, min_event_rate_diff=0.02)
+    binner = _fit_binner(X, y, params, {}, "safra")
+
+    cache = _CodesCache(maxsize=2)
+    args = (binner, X, y, "safra", t, 0.7, 0.2, 0.1)
+    first = _score_binner(*args, codes_cache=cache)
+    assert len(cache._data) == 1
+    assert _score_binner(*args, codes_cache=cache) == first == _score_binner(*args)
+
+
+def test_single_feature_trials_run_to_completion():
+    import optuna
+    rng = np.random.default_rng(5)
+    X = pd.DataFrame({"x": rng.normal(size=300)})
+    t = pd.Series(rng.choice([202301, 202302, 202303], size=300))
+    y = (X["x"] + rng.normal(size=300) > 0).astype(int)
+    storage = optuna.storages.InMemoryStorage()
+    optimize_bins(X, y, time_col="safra", time_values=t, n_trials=4,
+                  storage=storage, study_name="s")
+    study = optuna.load_study(study_name="s", storage=storage)
+    # sem valor intermediário antes do ajuste: nada a podar
+    assert all(tr.state == optuna.trial.TrialState.COMPLETE for tr in study.trials)
+    assert all(not tr.intermediate_values for tr in study.trials)
@@ -1 +1,25 @@
 # test_refinement.py
+import pandas as pd
+
+from nasabinning.refinement import refine_bins
+
+
+def test_refine_bins_normalizes_without_touching_input():
+    raw = pd.DataFrame({
+        "variable": "x",
+        "Bin": ["(-inf, 0.5)", "[0.5, inf)"],
+        "Count": [10, 20],
+        "Event": [2, 12],
+        "Non-event": [8, 8],
+    }, index=[5, 9])
+    before = raw.copy()
+
+    out = refine_bins(raw, min_er_delta=0.0)
+    assert list(out.columns) == ["variable", "bin", "count", "event", "non_event", "event_rate"]
+    assert list(out.index) == [0, 1]
+    assert out["event_rate"].tolist() == [0.2, 0.6]
+    pd.testing.assert_frame_equal(raw, before)
+
+    merged = refine_bins(raw, min_er_delta=0.5)
+    assert merged["bin"].tolist() == ["(-inf, inf)"]
+    assert merged.attrs["iv"] == 0.0
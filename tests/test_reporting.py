@@ -13,3 +13,42 @@ def test_save_excel(tmp_path: Path):
     file_path = tmp_path / "report.xlsx"
     save_binner_report(binner, file_path)
     assert file_path.exists() and file_path.stat().st_size > 0
+
+
+def test_save_json(tmp_path: Path):
+    import json
+    rng = np.random.default_rng(4)
+    X = pd.DataFrame({"x": rng.normal(size=100)})
+    y = (X["x"] > 0).astype(int)
+    binner = NASABinner(strategy="supervised").fit(X, y)
+    file_path = tmp_path / "report.json"
+    save_binner_report(binner, file_path)
+    info = json.loads(file_path.read_text())
+    assert info["n_bins"] == len(info["bin_table"]) == len(binner.bin_summary)
+    assert np.isclose(info["iv"], binner.iv_)
+
+
+def test_save_excel_contents(tmp_path: Path):
+    rng = np.random.default_rng(5)
+    X = pd.DataFrame({"x": rng.normal(size=200)})
+    y = (X["x"] > 0).astype(int)
+    binner = NASABinner(strategy="supervised", max_bins=4).fit(X, y)
+    file_path = tmp_path / "report.xlsx"
+    save_binner_report(binner, file_path)
+
+    sheets = pd.read_excel(file_path, sheet_name=None)
+    assert set(sheets) == {"bin_table", "metrics"}
+    assert len(sheets["bin_table"]) == len(binner.bin_summary)
+    assert np.isclose(sheets["metrics"].loc[0, "value"], binner.iv_)
+
+
+def test_json_nan_is_null_with_and_without_orjson(monkeypatch):
+    import json
+    import sys
+    from nasabinning.reporting import _dumps
+
+    info = {"psi": float("nan"), "rows": [{"er": np.float32("nan"), "n": np.int64(3)}]}
+    expected = {"psi": None, "rows": [{"er": None, "n": 3}]}
+    assert json.loads(_dumps(info)) == expected             # orjson
+    monkeypatch.setitem(sys.modules, "orjson", None)        # força o fallback json
+    assert json.loads(_dumps(info)) == expected
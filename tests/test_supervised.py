@@ -0,0 +1,33 @@
+import pandas as pd
+import numpy as np
+from nasabinning.strategies.supervised import SupervisedBinning
+
+def test_supervised_parallel_columns_match_serial():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        "a": rng.normal(size=500),
+        "b": rng.uniform(size=500),
+    })
+    y = pd.Series((X["a"] + rng.normal(size=500) > 0).astype(int))
+    serial = SupervisedBinning(max_bins=5).fit(X, y)
+    parallel = SupervisedBinning(max_bins=5, n_jobs=2).fit(X, y)
+    assert list(parallel.models_) == ["a", "b"]
+    pd.testing.assert_frame_equal(serial.bin_summary_, parallel.bin_summary_)
+
+
+def test_supervised_records_solver_status():
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({"a": rng.normal(size=500)})
+    y = pd.Series((X["a"] + rng.normal(size=500) > 0).astype(int))
+    sb = SupervisedBinning(max_bins=5, time_limit=5).fit(X, y)
+    assert sb.status_["a"] in {"OPTIMAL", "FEASIBLE"}
+
+
+def test_supervised_parallel_transform_matches_serial():
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame({c: rng.normal(size=400) for c in "abc"})
+    y = pd.Series((X["a"] - X["c"] + rng.normal(size=400) > 0).astype(int))
+    sb = SupervisedBinning(max_bins=5).fit(X, y)
+    serial = sb.transform(X)
+    sb.n_jobs = 3
+    pd.testing.assert_frame_equal(sb.transform(X), serial)
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from nasabinning.temporal_stability import (
     event_rate_by_time,
+    ks_over_time,
     psi_over_time,
     temporal_separability_score,
 )
@@ -20,6 +21,9 @@ def test_event_rate_pivot_and_psi():
     assert pivot.shape == (3, 2)
     psi = psi_over_time(pivot)
     assert psi >= 0
+    # a matriz bin × safra em NumPy dá o mesmo resultado que o pivot
+    assert psi_over_time(pivot.to_numpy()) == psi
+    assert ks_over_time(pivot.to_numpy()) == ks_over_time(pivot)
 
 
 def test_temporal_separability_score():
@@ -32,3 +36,30 @@ def test_temporal_separability_score():
         df, 'x', 'bin', 'target', 'time'
     )
     assert score > 0
+
+
+def test_separability_score_with_panel():
+    from nasabinning.temporal_stability import build_time_bin_panel
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "a": rng.integers(0, 4, 400),
+        "b": rng.integers(0, 3, 400),
+        "target": rng.integers(0, 2, 400),
+        "time": rng.choice([202301, 202302, 202303], 400),
+    })
+    panel = build_time_bin_panel(df, ["a", "b"], "target", "time")
+    for col in ["a", "b"]:
+        kw = dict(penalize_inversions=True, penalize_low_freq=True)
+        direct = temporal_separability_score(df, col, col, "target", "time", **kw)
+        cached = temporal_separability_score(
+            None, col, col, "target", "time", panel=panel, **kw
+        )
+        assert cached == direct
+
+
+def test_ks_over_time_matches_scipy():
+    from scipy.stats import ks_2samp
+    rng = np.random.default_rng(3)
+    curves = np.round(rng.random((12, 4)), 2)
+    expected = ks_2samp(curves[:, 0], curves[:, -1]).statistic
+    assert ks_over_time(curves) == expected
@@ -12,3 +12,24 @@ def test_unsupervised_multi_column():
     Xt = ub.fit(X).transform(X)
     assert Xt.shape == X.shape
     assert Xt.nunique().max() <= 4
+
+
+def test_unsupervised_edges_cached_on_disk(tmp_path):
+    from joblib import Memory
+    from nasabinning.strategies.unsupervised import _fit_kbd
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({"a": rng.normal(size=200)})
+    first = UnsupervisedBinning(n_bins=4, cache_dir=str(tmp_path)).fit(X)
+    cached = Memory(str(tmp_path), verbose=0).cache(_fit_kbd)
+    assert cached.check_call_in_cache(X, "quantile", 4)
+    second = UnsupervisedBinning(n_bins=4, cache_dir=str(tmp_path)).fit(X)
+    pd.testing.assert_frame_equal(first.transform(X), second.transform(X))
+
+
+def test_unsupervised_downcast_codes():
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame({"a": rng.normal(size=300), "b": rng.uniform(size=300)})
+    full = UnsupervisedBinning(n_bins=5).fit(X).transform(X)
+    small = UnsupervisedBinning(n_bins=5, downcast=True).fit(X).transform(X)
+    assert (small.dtypes == np.int16).all()
+    pd.testing.assert_frame_equal(small.astype(np.float64), full)
@@ -0,0 +1,37 @@
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from nasabinning import NASABinner
+
+
+def _fitted():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"x": rng.normal(size=1500), "z": rng.normal(size=1500)})
+    X["safra"] = rng.choice([202301, 202302, 202303], size=1500)
+    y = pd.Series((X["x"] + rng.normal(scale=0.5, size=1500) > 0).astype(int))
+    binner = NASABinner(max_bins=4).fit(X[["x", "z"]], y)
+    return binner, binner.stability_over_time(X, y, time_col="safra")
+
+
+def test_plot_agg_saves_one_png_per_variable(tmp_path):
+    binner, pivot = _fitted()
+    paths = binner.plot_event_rate_stability(pivot, backend="agg", save_dir=tmp_path)
+    assert paths == [tmp_path / "x.png", tmp_path / "z.png"]
+    assert all(p.stat().st_size > 0 for p in paths)
+
+
+def test_plot_colors_follow_event_rate(monkeypatch):
+    binner, pivot = _fitted()
+    shown = []
+    monkeypatch.setattr(plt, "show", lambda: shown.append(plt.gcf()))
+    binner.plot_event_rate_stability(pivot)
+    assert len(shown) == 2
+
+    lines = shown[0].axes[0].lines
+    bs = binner.bin_summary[binner.bin_summary["variable"] == "x"]
+    rate = dict(zip(bs["bin"].astype(str), bs["event_rate"]))
+    # tons do claro ao escuro ⇔ event rate crescente
+    by_shade = sorted(lines, key=lambda ln: -sum(matplotlib.colors.to_rgb(ln.get_color())))
+    assert [ln.get_label() for ln in by_shade] == sorted(rate, key=rate.get)